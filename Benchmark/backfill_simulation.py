@@ -0,0 +1,165 @@
+"""Resource scheduler simulation. Replays a queue of experiments (generated, or recorded in a CSV file) through the
+resource locking logic of the Facility, using a simulated clock, once with each `ResourceScheduler` policy. Reports
+the makespan, the utilization of the resources, the waiting times and, for the backfilling policy, how many
+experiments started ahead of older ones and whether any of them was delayed compared to the FIFO policy.
+
+Recorded queues are CSV files with the following columns (one row per experiment, in order of creation):
+    arrival      Seconds since the start of the queue at which the experiment started waiting for resources
+    duration     Seconds that the experiment kept the resources locked
+    resources    Identifiers of the resources used by the experiment, separated by ';'
+    testcase     Name of the test case, used for predicting the duration from previous executions
+    reservation  ReservationTime of the descriptor (minutes), may be empty
+
+Usage: python -m Benchmark.backfill_simulation [--file QUEUE.csv] [--save QUEUE.csv] [--experiments N]
+                                               [--resources N] [--interval MIN] [--reserved RATIO] [--seed N]
+"""
+import csv
+import heapq
+import random
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from importlib import import_module
+from math import ceil
+from os import devnull
+from types import SimpleNamespace
+from typing import Dict, List
+import yaml
+
+
+def generate(count: int, resourceCount: int, interval: float, reserved: float, seed: int) -> List[Dict]:
+    """Test cases with a typical duration (5 to 60 minutes) and a fixed set of 1 to 3 resources. Experiments arrive
+    every `interval` minutes on average, their actual duration varies around the typical one, and a `reserved`
+    ratio of them define a ReservationTime somewhat longer than the typical duration"""
+    rng = random.Random(seed)
+    resources = [f'Resource{index}' for index in range(resourceCount)]
+    testCases = {}
+    for index in range(max(3, resourceCount)):
+        testCases[f'TestCase{index}'] = (rng.uniform(5, 60) * 60,
+                                        rng.sample(resources, rng.randint(1, min(3, resourceCount))))
+    names = list(testCases.keys())
+
+    experiments, arrival = [], 0.0
+    for _ in range(count):
+        arrival += rng.expovariate(1 / (interval * 60))
+        name = rng.choice(names)
+        typical, used = testCases[name]
+        reservation = ceil(typical * rng.uniform(1.1, 1.5) / 60) if rng.random() < reserved else None
+        experiments.append({'arrival': arrival, 'duration': rng.lognormvariate(0, 0.2) * typical,
+                            'resources': used, 'testcase': name, 'reservation': reservation})
+    return experiments
+
+
+def load(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        return [{'arrival': float(row['arrival']), 'duration': float(row['duration']),
+                 'resources': [value for value in row['resources'].split(';') if value],
+                 'testcase': row['testcase'],
+                 'reservation': float(row['reservation']) if row.get('reservation', '') else None}
+                for row in csv.DictReader(file)]
+
+
+def save(experiments: List[Dict], path: str):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, ['arrival', 'duration', 'resources', 'testcase', 'reservation'])
+        writer.writeheader()
+        for experiment in experiments:
+            writer.writerow({**experiment, 'resources': ';'.join(experiment['resources']),
+                             'reservation': '' if experiment['reservation'] is None else experiment['reservation']})
+
+
+def simulate(experiments: List[Dict], scheduler: str) -> List[float]:
+    """Returns the time at which each experiment locked its resources"""
+    from Facility import Facility
+    from Facility.resource import Resource
+    from Settings import Config
+
+    Config.data['ResourceScheduler'] = scheduler
+    resources = sorted({resource for experiment in experiments for resource in experiment['resources']})
+    Facility.resources = {id: Resource({'Id': id, 'Name': id}) for id in resources}
+    Facility.requesters, Facility.waiters, Facility.events = {}, {}, {}
+    Facility.lockedAt, Facility.predictedEnd, Facility.history = {}, {}, {}
+    Facility.activeExperiments, Facility.activeExclusive = [], None
+    now = [0.0]
+    Facility.clock = lambda: now[0]
+
+    owners = [SimpleNamespace(ExecutionId=index, Descriptor=SimpleNamespace(
+        Duration=experiment['reservation'], TestCases=[experiment['testcase']]))
+        for index, experiment in enumerate(experiments)]
+    events = [(experiment['arrival'], 1, index) for index, experiment in enumerate(experiments)]
+    heapq.heapify(events)
+    starts: List[float] = [0.0] * len(experiments)
+    waiting: List[int] = []
+
+    while len(events) != 0:
+        now[0] = events[0][0]
+        while len(events) != 0 and events[0][0] == now[0]:
+            _, kind, index = heapq.heappop(events)
+            if kind == 0:  # Finished, released before processing the arrivals at the same time
+                Facility.ReleaseResources(experiments[index]['resources'], owners[index])
+            else:
+                waiting.append(index)
+
+        for index in sorted(waiting):  # Every waiting experiment retries, oldest first
+            if Facility.TryLockResources(experiments[index]['resources'], owners[index], False):
+                waiting.remove(index)
+                starts[index] = now[0]
+                heapq.heappush(events, (now[0] + experiments[index]['duration'], 0, index))
+    return starts
+
+
+def report(name: str, experiments: List[Dict], starts: List[float], reference: List[float] = None):
+    ends = [start + experiment['duration'] for start, experiment in zip(starts, experiments)]
+    makespan = max(ends) - min(experiment['arrival'] for experiment in experiments)
+    resources = {resource for experiment in experiments for resource in experiment['resources']}
+    busy = sum(experiment['duration'] * len(experiment['resources']) for experiment in experiments)
+    waits = sorted(start - experiment['arrival'] for start, experiment in zip(starts, experiments))
+    ahead = sum(1 for index, experiment in enumerate(experiments)
+                if any(starts[other] > starts[index] >= experiments[other]['arrival']
+                       and set(experiments[other]['resources']) & set(experiment['resources'])
+                       for other in range(index)))  # Started while an older experiment was waiting for a resource
+    line = (f"  {name:>9} {makespan / 3600:9.2f} {busy / (len(resources) * makespan) * 100:11.1f}% "
+            f"{sum(waits) / len(waits) / 60:10.1f} {waits[int(len(waits) * 0.95)] / 60:9.1f} {ahead:6}")
+    if reference is not None:
+        delays = [start - previous for start, previous in zip(starts, reference) if start > previous + 1e-6]
+        line += f" {len(delays):8} {max(delays, default=0) / 60:10.1f}"
+    print(line)
+
+
+def main():
+    parser = ArgumentParser(description="Resource scheduler (FIFO / backfilling) simulation")
+    parser.add_argument('--file', default=None, help="Recorded queue (CSV) to replay")
+    parser.add_argument('--save', default=None, help="Save the generated queue (CSV) for replaying it later")
+    parser.add_argument('--experiments', type=int, default=500, help="Experiments in the generated queue")
+    parser.add_argument('--resources', type=int, default=6, help="Resources of the generated facility")
+    parser.add_argument('--interval', type=float, default=12.0, help="Mean time between arrivals (minutes)")
+    parser.add_argument('--reserved', type=float, default=0.7, help="Ratio of experiments with ReservationTime")
+    parser.add_argument('--seed', type=int, default=1, help="Seed of the generated queue")
+    args = parser.parse_args()
+
+    import_module('Helper')  # Side effect only: Helper must be loaded before Settings and Facility (cyclic imports)
+    from Settings import Config
+    with open('Settings/default_config', 'r', encoding='utf-8') as file:
+        Config.data = yaml.safe_load(file)
+
+    if args.file is not None:
+        experiments = load(args.file)
+        print(f"Replaying {len(experiments)} experiments from {args.file}")
+    else:
+        experiments = generate(args.experiments, args.resources, args.interval, args.reserved, args.seed)
+        print(f"Generated {len(experiments)} experiments, {args.resources} resources, one arrival every "
+              f"{args.interval} minutes, {args.reserved * 100:.0f}% with ReservationTime (seed {args.seed})")
+        if args.save is not None:
+            save(experiments, args.save)
+
+    with open(devnull, 'w') as output, redirect_stdout(output):  # Log is not initialized, discard its messages
+        fifo = simulate(experiments, 'Fifo')
+        backfill = simulate(experiments, 'Backfill')
+
+    print(f"  {'Scheduler':>9} {'Span (h)':>9} {'Utilization':>12} {'Wait (min)':>10} {'p95 (min)':>9} "
+          f"{'Ahead':>6} {'Delayed':>8} {'Max (min)':>10}")
+    report('Fifo', experiments, fifo)
+    report('Backfill', experiments, backfill, fifo)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark of CSV ingestion (InfluxDb.CsvToPayloads): row by row conversion (reference implementation of the
+previous per-cell approach) against the vectorized, column-level conversion. Optionally checks that both produce
+the same line protocol.
+
+Usage: python -m Benchmark.csv_ingestion [--rows N] [--chunk N] [--unit s|ms|ns|iso] [--check] [--file PATH]
+"""
+from argparse import ArgumentParser
+from csv import DictReader, Dialect, QUOTE_NONE
+from datetime import datetime, timezone
+from os import remove
+from os.path import getsize
+from tempfile import mkstemp
+from time import perf_counter
+from typing import Iterator, List
+import random
+import os
+from dateutil.parser import isoparse
+from Helper.influx import InfluxDb, InfluxPayload, InfluxPoint
+
+
+class _dialect(Dialect):
+    delimiter = ','
+    escapechar = None
+    doublequote = False
+    skipinitialspace = False
+    lineterminator = '\r\n'
+    quotechar = '"'
+    quoting = QUOTE_NONE
+
+
+def rowByRow(csvFile: str, chunkSize: int, keysToRemove: List[str]) -> Iterator[InfluxPayload]:
+    """Per-cell conversion, as performed before the vectorized implementation"""
+    from Executor.Tasks.Run.to_influx import ToInfluxBase
+
+    def _convert(value: str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        return {'true': True, 'false': False}.get(value.lower(), value)
+
+    def _timestamp(value: str) -> datetime:
+        try:
+            ts = float(value)
+        except ValueError:
+            return isoparse(value)
+        if ts > 1e17:
+            return datetime.fromtimestamp(ts / 1e9, tz=timezone.utc)
+        elif ts > 1e12:
+            return datetime.fromtimestamp(ts / 1e3, tz=timezone.utc)
+        return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+    with open(csvFile, 'r', encoding='utf-8', newline='') as file:
+        keys = [k.strip() for k in file.readline().split(',')]
+        payload = InfluxPayload('Benchmark')
+        for row in DictReader(file, fieldnames=keys, restval=None, dialect=_dialect()):
+            if payload.PointCount >= chunkSize:
+                yield payload
+                payload = InfluxPayload('Benchmark')
+            point = InfluxPoint(_timestamp(row.pop('Timestamp')))
+            for key, value in row.items():
+                if key not in keysToRemove:
+                    point.Fields[ToInfluxBase.sanitize_string(key)] = _convert(value)
+            payload.Points.append(point)
+        if payload.PointCount != 0:
+            yield payload
+
+
+def vectorized(csvFile: str, chunkSize: int, keysToRemove: List[str]):
+    return InfluxDb.CsvToPayloads('Benchmark', csvFile, ',', 'Timestamp', keysToRemove=keysToRemove,
+                                  chunkSize=chunkSize)
+
+
+def generate(path: str, rows: int, unit: str):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    scale = {'s': 1, 'ms': 1e3, 'ns': 1e9}
+    rng = random.Random(42)
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        output.write('Timestamp,Throughput (Mbps),Latency,Jitter,Loss,Counter,Connected,Label,ExecutionId\r\n')
+        for i in range(rows):
+            seconds = start + i * 0.001
+            if unit == 'iso':
+                timestamp = datetime.fromtimestamp(seconds, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+            elif unit == 'ns':
+                timestamp = str(int(seconds * 1e6) * 1000)
+            else:
+                timestamp = repr(round(seconds * scale[unit], 3))
+            output.write(f'{timestamp},{rng.uniform(0, 1000):.3f},{rng.uniform(1, 50):.2f},{rng.random():.4f},'
+                         f'{rng.randint(0, 5)},{i},{"True" if i % 7 else "false"},cell_{i % 13},1\r\n')
+
+
+def run(name, method, csvFile: str, chunkSize: int, keysToRemove: List[str]):
+    start = perf_counter()
+    points = 0
+    lines = []
+    for payload in method(csvFile, chunkSize, keysToRemove):
+        points += payload.PointCount
+        lines.append(payload.LineProtocol)
+    elapsed = perf_counter() - start
+    print(f"  {name:12}: {elapsed:8.3f} s, {points / elapsed:12.0f} rows/s (conversion + line protocol)")
+    return elapsed, lines
+
+
+def main():
+    parser = ArgumentParser(description="CSV ingestion benchmark")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunk', type=int, default=10000)
+    parser.add_argument('--unit', choices=['s', 'ms', 'ns', 'iso'], default='s')
+    parser.add_argument('--file', default=None, help="Use an existing CSV file (with a 'Timestamp' column)")
+    parser.add_argument('--check', action='store_true', help="Check that both methods produce the same output")
+    args = parser.parse_args()
+
+    if args.file is None:
+        handle, csvFile = mkstemp(suffix='.csv')
+        os.close(handle)
+        generate(csvFile, args.rows, args.unit)
+    else:
+        csvFile = args.file
+
+    try:
+        print(f"{csvFile} ({getsize(csvFile) / 2**20:.1f} MiB), chunks of {args.chunk} rows")
+        keysToRemove = ['ExecutionId']
+        rowTime, rowLines = run('Row by row', rowByRow, csvFile, args.chunk, keysToRemove)
+        vectorTime, vectorLines = run('Vectorized', vectorized, csvFile, args.chunk, keysToRemove)
+        print(f"  Speedup     : {rowTime / vectorTime:.2f}x")
+
+        if args.check:
+            def _normalize(chunks):
+                for chunk in chunks:
+                    for line in chunk.decode('utf-8').split('\n'):
+                        prefix, fields, timestamp = line.rsplit(' ', 2)
+                        yield prefix, sorted(fields.split(',')), timestamp
+            same = all(a == b for a, b in zip(_normalize(rowLines), _normalize(vectorLines)))
+            print(f"  Same output : {same}")
+    finally:
+        if args.file is None:
+            remove(csvFile)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Minimal stand-in for an InfluxDb instance, for benchmarking. Emulates the `/ping`, V1 `/write` and
+V2 `/api/v2/write` endpoints (including gzip request bodies), counting the received points (lines) and bytes
+without storing them. For V1, the `/query` endpoint serves synthetic values for the series in `Measurements`."""
+from datetime import datetime, timezone, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread, Condition
+from time import sleep
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+import gzip
+import json
+import re
+
+
+class InfluxStub:
+    versions = {'1': '1.8.10', '2': 'v2.7.11'}  # X-Influxdb-Version, as reported by each version
+
+    def __init__(self, version: str = '1', delay: float = 0.0, bandwidth: float = 0.0):
+        """`delay` (seconds) is added to the processing of every write request and query. If `bandwidth` (bytes per second)
+        is set, an additional delay proportional to the size of the request body is added, emulating a slow link"""
+        self.version = version
+        self.delay = delay
+        self.bandwidth = bandwidth
+        self.condition = Condition()
+        self.Points = 0
+        self.Requests = 0
+        self.Queries = 0
+        self.Measurements: Dict[str, int] = {}  # Dict[<Measurement>: <Points>], served by V1 /query
+        self.Bytes = 0  # As received, possibly compressed
+        self.RawBytes = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = Thread(target=self.server.serve_forever, name="InfluxStub", daemon=True)
+
+    @property
+    def Host(self) -> str:
+        return self.server.server_address[0]
+
+    @property
+    def Port(self) -> int:
+        return self.server.server_address[1]
+
+    def Start(self) -> 'InfluxStub':
+        self.thread.start()
+        return self
+
+    def Stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def Reset(self):
+        with self.condition:
+            self.Points = self.Requests = self.Queries = self.Bytes = self.RawBytes = 0
+
+    def WaitForPoints(self, points: int, timeout: float) -> bool:
+        with self.condition:
+            return self.condition.wait_for(lambda: self.Points >= points, timeout)
+
+    def _received(self, size: int, body: bytes):
+        with self.condition:
+            self.Requests += 1
+            self.Bytes += size
+            self.RawBytes += len(body)
+            self.Points += sum(1 for line in body.split(b'\n') if len(line) != 0)
+            self.condition.notify_all()
+
+    def _query(self, query: str, chunkSize: int) -> List[Dict]:
+        """Replies (one per chunk) to the queries used for retrieving the results of an execution"""
+        with self.condition:
+            self.Queries += 1
+
+        def _series(name: str, columns: List[str], values: List[List], **extra) -> Dict:
+            return {'results': [{'statement_id': 0, 'series': [{'name': name, 'columns': columns, 'values': values,
+                                                                **extra}]}]}
+
+        lower = query.lower()
+        if lower.startswith('show measurements'):
+            return [_series('measurements', ['name'], [[name] for name in self.Measurements.keys()])]
+
+        match = re.search(r'from "(\w+)"', query, re.IGNORECASE)
+        points = self.Measurements.get(match.group(1), 0) if match else 0
+        if points == 0:
+            return [{'results': [{'statement_id': 0}]}]
+        name = match.group(1)
+        if lower.startswith('show tag keys'):
+            return [_series(name, ['tagKey'], [['ExecutionId'], ['host']])]
+
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        tags = {'ExecutionId': '1', 'host': 'benchmark'}
+        res = []
+        for first in range(0, points, chunkSize):
+            values = [[(start + timedelta(seconds=i)).strftime('%Y-%m-%dT%H:%M:%SZ'), i * 0.5, i, i % 2 == 0, 'text']
+                      for i in range(first, min(points, first + chunkSize))]
+            res.append(_series(name, ['time', 'value', 'count', 'flag', 'label'], values, tags=tags))
+        return res
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status: int, body: bytes = b''):
+                self.send_response(status)
+                self.send_header('X-Influxdb-Version', stub.versions[stub.version])
+                self.send_header('Content-Length', str(len(body)))
+                if len(body) != 0:
+                    self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/ping':
+                    self.reply(204)
+                elif url.path == '/query' and stub.version == '1':
+                    query = parse_qs(url.query)
+                    if stub.delay > 0:
+                        sleep(stub.delay)
+                    chunks = stub._query(query['q'][0], int(query.get('chunk_size', ['10000'])[0]))
+                    self.reply(200, '\n'.join(json.dumps(chunk) for chunk in chunks).encode('utf-8'))
+                else:
+                    self.reply(404)
+
+            do_HEAD = do_GET
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+                if (stub.version == '1' and (url.path != '/write' or 'db' not in query)) or \
+                        (stub.version == '2' and (url.path != '/api/v2/write' or 'bucket' not in query)):
+                    self.reply(404, b'{"error": "unexpected endpoint"}')
+                    return
+
+                delay = stub.delay + (len(body) / stub.bandwidth if stub.bandwidth > 0 else 0)
+                if delay > 0:
+                    sleep(delay)
+
+                size = len(body)
+                if self.headers.get('Content-Encoding', '') == 'gzip':
+                    body = gzip.decompress(body)
+                stub._received(size, body)
+                self.reply(204)
+
+        return Handler
@@ -0,0 +1,233 @@
+"""Ingestion throughput benchmark. Runs synthetic producers for each of the paths that send values to InfluxDb,
+writing to a local stand-in of the database (see influx_stub.py), and reports the points per second, the write
+request latency (p50/p99), the amount of data sent and the memory (RSS) of the process after each path.
+With `--gzip`, every path is executed twice, without and with compression of the write requests.
+
+Paths:
+    send      ToInfluxBase._send_to_influx, one point with several fields per call
+    telegraf  Run.TelegrafToInflux, JSON metrics received through the TCP socket
+    mqtt      Run.MqttToInflux, JSON messages delivered to the on_message callback
+    kafka     Run.KafkaConsumerToInflux, JSON messages processed as consumed from a topic
+    csv       Run.CsvToInflux, complete task run over a generated CSV file
+
+Usage: python -m Benchmark.ingestion [--version 1|2] [--points N] [--delay MS] [--bandwidth MBPS] [--gzip]
+                                     [--paths send,telegraf,...]
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from importlib import import_module
+from os import remove, close
+from tempfile import mkstemp
+from threading import Thread, Event
+from time import perf_counter, sleep
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+import json
+import socket
+import psutil
+import yaml
+from Benchmark.influx_stub import InfluxStub
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+FIELDS = 8
+
+
+def configure(stub: InfluxStub, queueSize: int):
+    """Points the ELCM configuration to the stub without reading or creating config.yml. The queue is large
+    enough for all the payloads of a path, so that the producers are not limited by the writer"""
+    import_module('Helper')  # Side effect only: Helper must be loaded before Settings (cyclic imports)
+    from Settings import Config
+    with open('Settings/default_config', 'r', encoding='utf-8') as file:
+        data = yaml.safe_load(file)
+    influx = {'Enabled': True, 'Host': stub.Host, 'Port': stub.Port, 'Database': 'benchmark',
+              'QueueSize': queueSize}
+    if stub.version == '2':
+        influx.update({'Token': 'benchmark-token', 'Org': 'benchmark'})
+    data['InfluxDb'] = {**data['InfluxDb'], **influx}
+    data['Metadata'] = {'HostIp': '127.0.0.1', 'Facility': 'Benchmark'}
+    Config.data = data
+
+
+def setGzip(enabled: bool):
+    from Helper import InfluxDb
+    from Settings import Config
+    Config.data['InfluxDb']['Gzip'] = enabled
+    InfluxDb._http = None  # Recreated with the new configuration on the next write
+
+
+class Latency:
+    """Measures the duration of each write request sent by the background writer"""
+
+    def __init__(self):
+        from Helper.influx import InfluxDb
+        self.samples: List[float] = []
+        original = InfluxDb._post.__func__
+
+        def _timed(cls, body: bytes):
+            start = perf_counter()
+            try:
+                original(cls, body)
+            finally:
+                self.samples.append(perf_counter() - start)
+
+        InfluxDb._post = classmethod(_timed)
+
+    def Reset(self):
+        self.samples = []
+
+    def Percentile(self, value: float) -> float:
+        if len(self.samples) == 0: return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * value / 100))]
+
+
+def _parent(executionId: int):
+    return SimpleNamespace(params={'UserId': 1, 'ExecutionId': executionId}, stopRequested=False,
+                           ReadMilestone=lambda _: False)
+
+
+def _log(level, message):
+    if getattr(level, 'name', level) in ['ERROR', 'CRITICAL']:
+        print(f"    {message}")
+
+
+def _fields(index: int) -> Dict[str, float]:
+    return {f'field_{f}': index * 0.5 + f for f in range(FIELDS)}
+
+
+def produceSend(executionId: int, points: int) -> int:
+    from Executor.Tasks.Run.to_influx import ToInfluxBase
+    task = ToInfluxBase("Benchmark", _parent(executionId), {}, _log, None)
+    for i in range(points):
+        task._send_to_influx('Benchmark', _fields(i), START + i * 0.001, executionId)
+    return points
+
+
+def produceTelegraf(executionId: int, points: int) -> int:
+    from Executor.Tasks.Run.telegraf_ToInflux import TelegrafToInflux
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    task = TelegrafToInflux(_log, _parent(executionId), {'ExecutionId': executionId, 'Measurement': 'Benchmark',
+                                                          'Stop': 'Stop', 'Encryption': False, 'Port': port})
+    stop = Event()
+    handler = Thread(target=task.tcp_handler, args=(stop,), daemon=True)
+    handler.start()
+
+    client = None
+    while client is None:
+        try:
+            client = socket.create_connection(('127.0.0.1', port))
+        except ConnectionRefusedError:
+            sleep(0.01)
+
+    with client:
+        for i in range(points):
+            metric = {'fields': _fields(i), 'name': 'cpu', 'tags': {'host': 'benchmark'},
+                      'timestamp': int(START) + i}
+            client.sendall(json.dumps(metric).encode('utf-8'))
+    handler.join()  # The handler ends once the connection is closed and all the data has been processed
+    stop.set()
+    return points
+
+
+def _messages(points: int) -> List[bytes]:
+    """JSON messages, each one is flattened to FIELDS points"""
+    return [json.dumps({'timestamp': START + i, 'metrics': _fields(i)}).encode('utf-8')
+            for i in range(points // FIELDS)]
+
+
+def produceMqtt(executionId: int, points: int) -> int:
+    from Executor.Tasks.Run.mqtt_ToInflux import MqttToInflux
+    task = MqttToInflux(_log, _parent(executionId), {'ExecutionId': executionId, 'Measurement': 'Benchmark',
+                                                     'Timestamp': 'timestamp'})
+    messages = _messages(points)
+    for message in messages:
+        task.on_message(None, None, SimpleNamespace(payload=message))
+    return len(messages) * FIELDS
+
+
+def produceKafka(executionId: int, points: int) -> int:
+    from Executor.Tasks.Run.kafka_consumerToInflux import KafkaConsumerToInflux
+    task = KafkaConsumerToInflux(_log, _parent(executionId), {})
+    messages = [json.loads(m) for m in _messages(points)]  # As done by the consumer's value_deserializer
+    for message in messages:
+        task.process_message(SimpleNamespace(value=message), 'Benchmark', executionId, 'timestamp', False)
+    return len(messages) * FIELDS
+
+
+def produceCsv(executionId: int, points: int) -> int:
+    from Executor.Tasks.Run.csvToInflux import CsvToInflux
+    handle, csvFile = mkstemp(suffix='.csv')
+    close(handle)
+    try:
+        with open(csvFile, 'w', encoding='utf-8', newline='') as output:
+            output.write(','.join(['Timestamp', *_fields(0).keys()]) + '\r\n')
+            for i in range(points):
+                output.write(','.join([repr(START + i * 0.001), *(str(v) for v in _fields(i).values())]) + '\r\n')
+
+        task = CsvToInflux(_log, _parent(executionId), {'ExecutionId': executionId, 'CSV': csvFile,
+                                                        'Measurement': 'Benchmark'})
+        task.Start()
+    finally:
+        remove(csvFile)
+    return points
+
+
+PATHS: Dict[str, Callable[[int, int], int]] = {
+    'send': produceSend, 'telegraf': produceTelegraf, 'mqtt': produceMqtt, 'kafka': produceKafka, 'csv': produceCsv
+}
+
+
+def main():
+    parser = ArgumentParser(description="InfluxDb ingestion throughput benchmark")
+    parser.add_argument('--version', choices=['1', '2'], default='1', help="InfluxDb version to emulate")
+    parser.add_argument('--points', type=int, default=20000, help="Points generated for each path")
+    parser.add_argument('--delay', type=float, default=0.0, help="Added latency of each write request (ms)")
+    parser.add_argument('--bandwidth', type=float, default=0.0,
+                        help="Emulated bandwidth of the link to the database (Mbit/s), unlimited if 0")
+    parser.add_argument('--gzip', action='store_true', help="Compare uncompressed and gzip compressed writes")
+    parser.add_argument('--paths', default=','.join(PATHS.keys()))
+    args = parser.parse_args()
+
+    stub = InfluxStub(args.version, args.delay / 1000, args.bandwidth * 1e6 / 8).Start()
+    configure(stub, max(10000, args.points))
+
+    from Helper.influx import InfluxDb
+    process = psutil.Process()
+    latency = Latency()
+    bandwidth = f"{args.bandwidth} Mbit/s" if args.bandwidth > 0 else "unlimited bandwidth"
+    print(f"InfluxDb V{args.version} stand-in at {stub.Host}:{stub.Port}, {args.points} points per path, "
+          f"{args.delay} ms added latency, {bandwidth}")
+    print(f"  {'Path':15} {'Points':>8} {'Points/s':>10} {'Requests':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'Sent (KiB)':>11} {'RSS (MiB)':>10}")
+
+    runs = [(name, compress) for name in args.paths.split(',') for compress in ([False, True] if args.gzip else [False])]
+    try:
+        for executionId, (name, compress) in enumerate(runs, start=1):
+            setGzip(compress)
+            stub.Reset()
+            latency.Reset()
+            label = f"{name} (gzip)" if compress else name
+            start = perf_counter()
+            try:
+                points = PATHS[name](executionId, args.points)
+                InfluxDb.Flush(executionId)
+            except Exception as e:
+                print(f"  {label:15} Failed: {e}")
+                InfluxDb.Writer().Flush()
+                continue
+            stub.WaitForPoints(points, timeout=10)
+            elapsed = perf_counter() - start
+
+            print(f"  {label:15} {stub.Points:8} {stub.Points / elapsed:10.0f} {stub.Requests:9} "
+                  f"{latency.Percentile(50) * 1000:9.2f} {latency.Percentile(99) * 1000:9.2f} "
+                  f"{stub.Bytes / 1024:11.1f} {process.memory_info().rss / 2**20:10.1f}")
+    finally:
+        stub.Stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Micro-benchmark of InfluxPayload serialization: current client paths (Serialized + client line protocol
+generation for V1 and V2) against the direct line protocol serializer used by the background writer.
+
+Usage: python -m Benchmark.line_protocol [--points N] [--fields N] [--repeat N]
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timezone, timedelta
+from time import perf_counter
+from influxdb.line_protocol import make_lines
+from Helper.influx import InfluxPayload, InfluxPoint, Versions
+
+
+def buildPayload(points: int, fields: int) -> InfluxPayload:
+    payload = InfluxPayload("Benchmark Measurement")
+    payload.Tags = {'ExecutionId': '1234', 'appname': 'ELCM', 'facility': 'Bench', 'host': '127.0.0.1'}
+    start = datetime.now(timezone.utc)
+    for i in range(points):
+        point = InfluxPoint(start + timedelta(milliseconds=i))
+        for f in range(fields):
+            point.Fields[f'field_{f}'] = i * 0.5 + f
+        point.Fields['label'] = f'sample "{i}"'
+        payload.Points.append(point)
+    return payload
+
+
+def serializeV1(payload: InfluxPayload) -> bytes:
+    payload.Version = Versions.V1
+    return make_lines({'points': payload.Serialized}).encode('utf-8')
+
+
+def serializeV2(payload: InfluxPayload) -> bytes:
+    payload.Version = Versions.V2
+    return '\n'.join(point.to_line_protocol() for point in payload.Serialized).encode('utf-8')
+
+
+def serializeDirect(payload: InfluxPayload) -> bytes:
+    return payload.LineProtocol
+
+
+def measure(method, payload: InfluxPayload, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        method(payload)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = ArgumentParser(description="InfluxPayload serialization micro-benchmark")
+    parser.add_argument('--points', type=int, default=50000)
+    parser.add_argument('--fields', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = buildPayload(args.points, args.fields)
+    print(f"{args.points} points, {args.fields + 1} fields per point (best of {args.repeat})")
+
+    results = {name: measure(method, payload, args.repeat) for name, method in
+               [('V1 client', serializeV1), ('V2 client', serializeV2), ('Line protocol', serializeDirect)]}
+    direct = results['Line protocol']
+    for name, elapsed in results.items():
+        perPoint = elapsed / args.points * 1e6
+        print(f"  {name:14}: {elapsed:8.3f} s total, {perPoint:7.2f} us/point ({elapsed / direct:5.2f}x line protocol)")
+
+
+if __name__ == '__main__':
+    main()
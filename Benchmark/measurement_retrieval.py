@@ -0,0 +1,56 @@
+"""Measurement retrieval benchmark. Retrieves all the measurements of an execution from a local stand-in of
+InfluxDb V1 (see influx_stub.py), as done when sending the results to the remote side of a distributed execution,
+using InfluxDb.GetMeasurements with different numbers of workers. Reports the total time, the points per second and
+the speedup over the sequential retrieval (1 worker).
+
+Usage: python -m Benchmark.measurement_retrieval [--measurements N] [--points N] [--delay MS] [--workers 1,2,4,...]
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+from Benchmark.influx_stub import InfluxStub
+from Benchmark.ingestion import configure
+
+
+def main():
+    parser = ArgumentParser(description="Concurrent measurement retrieval benchmark")
+    parser.add_argument('--measurements', type=int, default=30, help="Measurements of the execution")
+    parser.add_argument('--points', type=int, default=2000, help="Points of each measurement")
+    parser.add_argument('--delay', type=float, default=50.0, help="Added latency of each query (ms)")
+    parser.add_argument('--workers', default='1,2,4,8', help="Comma separated list of worker counts")
+    args = parser.parse_args()
+
+    stub = InfluxStub('1', args.delay / 1000).Start()
+    stub.Measurements = {f'Measurement_{index:02}': args.points for index in range(args.measurements)}
+    configure(stub, 10000)
+    workerCounts = [int(value) for value in args.workers.split(',')]
+    from Settings import Config
+    Config.data['InfluxDb']['PoolSize'] = max(workerCounts)
+
+    from Helper.influx import InfluxDb
+    print(f"InfluxDb V1 stand-in at {stub.Host}:{stub.Port}, {args.measurements} measurements of {args.points} "
+          f"points, {args.delay} ms added latency per query")
+    print(f"  {'Workers':>7} {'Time (s)':>9} {'Queries':>8} {'Points/s':>10} {'Speedup':>8}")
+
+    try:
+        measurements = InfluxDb.GetExecutionMeasurements(1)
+        reference, order = None, None
+        for workers in workerCounts:
+            stub.Reset()
+            start = perf_counter()
+            results = list(InfluxDb.GetMeasurements(1, measurements, workers=workers))
+            elapsed = perf_counter() - start
+
+            points = sum(payload.PointCount for _, payloads in results for payload in payloads)
+            names = [measurement for measurement, _ in results]
+            if order is not None and names != order:
+                print(f"  {workers:7} Measurements received in a different order")
+            order, reference = order or names, reference or elapsed
+            print(f"  {workers:7} {elapsed:9.3f} {stub.Queries:8} {points / elapsed:10.0f} "
+                  f"{reference / elapsed:7.2f}x")
+    finally:
+        InfluxDb.cleanup()
+        stub.Stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -44,7 +44,7 @@ class Parallel(Task):
         for index, info in enumerate(children, start=1):
             if info.Thread.is_alive():
                 info.Thread.join()
-                self.parent.params.update(info.TaskInstance.Vault)  # Propagate any published values
+                self.parent.PublishValues(info.TaskInstance.Vault)  # Propagate any published values
                 self.Log(Level.DEBUG, f"Branch {index} ({info.TaskDefinition.Label}) joined")
                 self.Verdict = Verdict.Max(self.Verdict, info.TaskInstance.Verdict)
 
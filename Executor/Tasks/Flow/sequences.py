@@ -30,7 +30,7 @@ class SequenceBase(Task):
         try:
             if (not self.parent.stopRequested) or (self.parent.stopRequested and (child.Params.get("NoStop", False) is True)):
                 taskInstance.Start()
-                self.parent.params.update(taskInstance.Vault)  # Propagate any published values
+                self.parent.PublishValues(taskInstance.Vault)  # Propagate any published values
         except Exception as e:
             taskInstance.Verdict = Verdict.Error
             self.Log(Level.ERROR, str(e))
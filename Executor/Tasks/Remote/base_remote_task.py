@@ -1,8 +1,11 @@
 from Task import Task
 from Settings import Config
+from time import monotonic
+from typing import Optional, Dict
 
 
 TIMEOUT = Config().EastWest.Timeout
+LONG_POLL = 30  # Maximum duration of each long-poll request, in seconds
 
 
 class BaseRemoteTask(Task):
@@ -11,3 +14,15 @@ class BaseRemoteTask(Task):
         self.timeout = self.params.get('Timeout', TIMEOUT)
         self.remoteApi = self.parent.RemoteApi
         self.remoteId = self.parent.RemoteId
+        self.deadline = None
+
+    @property
+    def Remaining(self) -> float:
+        if self.deadline is None:
+            self.deadline = monotonic() + self.timeout
+        return max(0.0, self.deadline - monotonic())
+
+    def waitForChange(self, revision: Optional[int], value: Optional[str] = None) -> Optional[Dict]:
+        """Waits for a change on the remote side (up to LONG_POLL seconds or the remaining timeout). Returns None
+        if the remote side does not support long-polling, in which case the caller must poll periodically"""
+        return self.remoteApi.WaitForChange(self.remoteId, revision, min(LONG_POLL, self.Remaining), value)
@@ -8,6 +8,8 @@ class GetValue(BaseRemoteTask):
         super().__init__("Get Value", logMethod, parent, params)
 
     def Run(self):
+        from Experiment import ExperimentStatus
+
         valueName = self.params.get('Value', None)
         publishName = self.params.get('PublishName', valueName)
 
@@ -17,17 +19,21 @@ class GetValue(BaseRemoteTask):
             return
 
         value = None
+        revision = None
         while value is None:
             self.Log(Level.DEBUG,
-                     f"Trying to retrieve '{valueName}' value from remote. Timeout in {self.timeout} seconds.")
-            value = self.remoteApi.GetValue(self.remoteId, valueName)
+                     f"Waiting for '{valueName}' value from remote. Timeout in {self.Remaining:.0f} seconds.")
+            reply = self.waitForChange(revision, valueName)
+            if reply is not None:
+                value, revision = reply['value'], reply['revision']
+            else:
+                value = self.remoteApi.GetValue(self.remoteId, valueName)
             if value is None:
-                if self.timeout <= 0:
+                if self.Remaining <= 0:
                     self.SetVerdictOnError()
                     raise RuntimeError(f"Timeout reached while waiting for remote remote value '{valueName}'.")
-                sleep(5)
-                self.timeout -= 5
+                if reply is None or reply['status'].value >= ExperimentStatus.Finished.value:
+                    sleep(min(5, self.Remaining))  # No long-poll support, or no further changes on the remote side
 
         self.Log(Level.INFO, f"Value received ({valueName}={value}).")
         self.Publish(publishName, value)
-
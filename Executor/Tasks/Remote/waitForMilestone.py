@@ -1,7 +1,6 @@
 from .base_remote_task import BaseRemoteTask
 from Helper import Level
 from time import sleep
-from Executor import ExecutorStatus
 
 
 class WaitForMilestone(BaseRemoteTask):
@@ -9,6 +8,8 @@ class WaitForMilestone(BaseRemoteTask):
         super().__init__("Wait for Milestone", logMethod, parent, params)
 
     def Run(self):
+        from Experiment import ExperimentStatus
+
         milestone = self.params.get('Milestone', None)
 
         if milestone is None:
@@ -17,21 +18,30 @@ class WaitForMilestone(BaseRemoteTask):
             return
 
         milestones = []
+        revision = None
         while milestone not in milestones:
             self.Log(Level.DEBUG,
-                     f"Trying to retrieve experiment status from remote. Timeout in {self.timeout} seconds.")
-            status, milestones = self.remoteApi.GetStatus(self.remoteId)
+                     f"Waiting for experiment status from remote. Timeout in {self.Remaining:.0f} seconds.")
+            reply = self.waitForChange(revision)
+            if reply is not None:
+                status, milestones, revision = reply['status'], reply['milestones'], reply['revision']
+            else:
+                status, milestones = self.remoteApi.GetStatus(self.remoteId)
             self.Log(Level.DEBUG, f"Status: '{status}'; Milestones: {milestones}")
 
-            if status in [ExecutorStatus.Cancelled, ExecutorStatus.Errored]:
+            if status in [ExperimentStatus.Cancelled, ExperimentStatus.Errored]:
                 self.SetVerdictOnError()
                 raise RuntimeError(f"Execution on remote side has been terminated with status: {status.name}")
 
+            if status == ExperimentStatus.Finished and milestone not in milestones:
+                self.SetVerdictOnError()
+                raise RuntimeError(f"Execution on remote side finished without reaching milestone '{milestone}'.")
+
             if milestone not in milestones:
-                if self.timeout <= 0:
+                if self.Remaining <= 0:
                     self.SetVerdictOnError()
                     raise RuntimeError(f"Timeout reached while waiting for milestone '{milestone}'.")
-                sleep(5)
-                self.timeout -= 5
+                if reply is None:
+                    sleep(min(5, self.Remaining))
 
         self.Log(Level.INFO, f"Remote side reached milestone '{milestone}'.")
@@ -1,9 +1,8 @@
 from prometheus_api_client import PrometheusConnect
 from .to_influx import ToInfluxBase
-from Helper import Level, influx
+from Helper import Level
 from datetime import datetime
 import requests
-import time
 
 class AthonetToInflux(ToInfluxBase):
 
@@ -66,8 +65,8 @@ class AthonetToInflux(ToInfluxBase):
             try:
                 self._send_to_influx(measurement, data, timestamp, executionId)
             except Exception as e:
-                if isinstance(e, influx.InfluxDBError) and e.response.status == 422:
-                    self.Log(Level.WARNING, f"Warning (ATHONET): Unprocessable entity (422). Invalid data: {data}")
+                if self._is_rejected(e):
+                    self.Log(Level.WARNING, f"Warning (ATHONET): InfluxDb rejected values sent by this task: {e}")
                 else:
                     self.Log(Level.ERROR, f"Failed to send data to InfluxDB (ATHONET). Exception: {e}")
                     raise RuntimeError(f"Exiting due to unexpected error: {e}")
@@ -180,8 +179,7 @@ class AthonetToInflux(ToInfluxBase):
         step = self.params['Step']
         measurement = self.params['Measurement']
 
-        while not self.parent.ReadMilestone(stop) and not self.parent.stopRequested:
-            time.sleep(1)
+        self.parent.WaitMilestone(stop)
         end_time = datetime.now()
 
         data_dict = {}
@@ -206,5 +204,6 @@ class AthonetToInflux(ToInfluxBase):
                 self.process_custom_queries(prometheus, queries_custom, data_dict)
             if data_dict:
                 self.send_data_to_influx(data_dict, measurement, executionId)
+                self._flush_influx(executionId)
         except Exception:
             self.SetVerdictOnError()
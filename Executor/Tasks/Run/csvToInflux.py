@@ -1,6 +1,5 @@
 from Task import Task
 from Helper import Level
-from time import sleep
 
 
 class CsvToInflux(Task):
@@ -12,7 +11,8 @@ class CsvToInflux(Task):
             'Measurement': (None, True),
             'Delimiter': (',', False),
             'Timestamp': ('Timestamp', False),
-            'Convert': (True, False)
+            'Convert': (True, False),
+            'ChunkSize': (10000, False)
         }
 
     def Run(self):
@@ -22,24 +22,29 @@ class CsvToInflux(Task):
         delimiter = self.params["Delimiter"]
         timestamp = self.params["Timestamp"]
         tryConvert = self.params["Convert"]
+        chunkSize = int(self.params["ChunkSize"])
 
+        from Helper import InfluxDb  # Delayed to avoid cyclic imports
+        keysToRemove = ['ExecutionId', *InfluxDb.BaseTags()]
+        self.Log(Level.DEBUG, f"The following columns will be replaced (as tags): {keysToRemove}")
+        self.Log(Level.INFO, f"Sending csv file to InfluxDb in chunks of {chunkSize} rows")
+
+        points = 0
         try:
-            from Helper import InfluxDb, InfluxPayload  # Delayed to avoid cyclic imports
-            self.Log(Level.INFO, "Converting csv file to payload")
-            keysToRemove = ['ExecutionId', *InfluxDb.BaseTags()]
-            self.Log(Level.DEBUG, f"The following columns will be replaced (as tags): {keysToRemove}")
-            payload = InfluxDb.CsvToPayload(measurement, csvFile, delimiter, timestamp,
-                                            tryConvert=tryConvert, keysToRemove=keysToRemove)
-            payload.Tags = {'ExecutionId': str(executionId)}
-            self.Log(Level.DEBUG, f"Payload: {payload}")
+            for payload in InfluxDb.CsvToPayloads(measurement, csvFile, delimiter, timestamp, tryConvert=tryConvert,
+                                                  keysToRemove=keysToRemove, chunkSize=chunkSize):
+                payload.Tags = {'ExecutionId': str(executionId)}
+                InfluxDb.Send(payload)
+                points += payload.PointCount
+                self.Log(Level.DEBUG, f"Sent chunk of {payload.PointCount} points ({points} total)")
         except Exception as e:
-            self.Log(Level.ERROR, f"Exception while converting CSV: {e}")
+            self.Log(Level.ERROR, f"Exception while converting or sending CSV values: {e}")
             self.SetVerdictOnError()
             return
 
         try:
-            self.Log(Level.INFO, "Sending payload to InfluxDb")
-            InfluxDb.Send(payload)
+            InfluxDb.Flush(executionId)
+            self.Log(Level.INFO, f"Sent {points} points to InfluxDb")
         except Exception as e:
             self.Log(Level.ERROR, f"Exception while sending CSV values to Influx: {e}")
             self.SetVerdictOnError()
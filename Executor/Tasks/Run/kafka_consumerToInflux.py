@@ -1,6 +1,6 @@
 from kafka import KafkaConsumer
 import json
-from Helper import Level, influx
+from Helper import Level
 from Settings import KAFKAConfig
 from .to_influx import ToInfluxBase
 from datetime import datetime
@@ -25,6 +25,25 @@ class KafkaConsumerToInflux(ToInfluxBase):
             'CSV': (False, False) # Flag to enable CSV export, optional.
         }
 
+    # Send the values of a single message to InfluxDB, returns False if the message was empty
+    def process_message(self, message, measurement, executionId, timestamp_init, csv_init):
+        if not csv_init:
+            data = message.value
+            flattened_data = self._flatten_json(data,timestamp_key=timestamp_init)
+            for key, value, timestamp in flattened_data:
+                measurement_data = {key: value}
+                if not isinstance(timestamp, (int, float)):
+                    dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+                    timestamp = int(dt.timestamp())
+                # Send the flattened data to InfluxDB
+                self._send_to_influx(measurement, measurement_data, timestamp, executionId)
+        else:
+            csv_data = message.value.strip()
+            if not csv_data:
+                return False
+            self._send_to_influx_CSV(measurement,csv_data,executionId)
+        return True
+
     def Run(self):
         # Extract necessary parameters from the params dictionary
         kafka = KAFKAConfig()
@@ -92,27 +111,15 @@ class KafkaConsumerToInflux(ToInfluxBase):
             # Consume messages from Kafka and send them to InfluxDB
             for message in consumer:
                 try:
-                    if not csv_init:
-                        data = message.value
-                        flattened_data = self._flatten_json(data,timestamp_key=timestamp_init)
-                        for key, value, timestamp in flattened_data:
-                            measurement_data = {key: value}
-                            if not isinstance(timestamp, (int, float)):
-                                dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                                timestamp = int(dt.timestamp())
-                            # Send the flattened data to InfluxDB
-                            self._send_to_influx(measurement, measurement_data, timestamp, executionId)
-                    else:
-                        csv_data = message.value.strip()
-                        if not csv_data:
-                            continue
-                        self._send_to_influx_CSV(measurement,csv_data,executionId)
+                    if not self.process_message(message, measurement, executionId, timestamp_init, csv_init):
+                        continue
                     break        
                 except Exception as e:
-                    if isinstance(e, influx.InfluxDBError) and e.response.status == 422:
-                        self.Log(Level.WARNING, f"Warning (KAFKA): Unprocessable entity (422). Invalid data: {data}")
+                    if self._is_rejected(e):
+                        self.Log(Level.WARNING, f"Warning (KAFKA): InfluxDb rejected values sent by this task: {e}")
                     else:
                         self.Log(Level.ERROR, f"Failed to send data to InfluxDB (KAFKA). Exception: {e}")
                         self.SetVerdictOnError()
                         raise RuntimeError(f"Exiting due to unexpected error: {e}")
-                
\ No newline at end of file
+
+        self._flush_influx(executionId)
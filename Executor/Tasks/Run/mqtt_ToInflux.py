@@ -1,9 +1,8 @@
 import paho.mqtt.client as mqtt
 import json
-from Helper import Level, influx
+from Helper import Level
 from Settings import MQTTConfig
 from .to_influx import ToInfluxBase
-import time
 
 class MqttToInflux(ToInfluxBase):
 
@@ -40,8 +39,8 @@ class MqttToInflux(ToInfluxBase):
                 # Send the flattened data to InfluxDB
                 self._send_to_influx(measurement, measurement_data, timestamp, self.params['ExecutionId'])
             except Exception as e:
-                if isinstance(e, influx.InfluxDBError) and e.response.status == 422:
-                    self.Log(Level.WARNING, f"Warning (MQTT): Unprocessable entity (422). Invalid data: {data}")
+                if self._is_rejected(e):
+                    self.Log(Level.WARNING, f"Warning (MQTT): InfluxDb rejected values sent by this task: {e}")
                 else:
                     self.Log(Level.ERROR, f"Failed to send data to InfluxDB (MQTT). Exception: {e}")
                     self.SetVerdictOnError()
@@ -107,9 +106,9 @@ class MqttToInflux(ToInfluxBase):
         # Start the MQTT client's network loop
         client.loop_start()
         
-        # Main loop to check for a stop signal from the control queue
-        while not self.parent.ReadMilestone(stop) and not self.parent.stopRequested:
-            time.sleep(1)
+        # Wait for the stop milestone (or the cancellation of the execution)
+        self.parent.WaitMilestone(stop)
         # Stop the MQTT client's network loop and disconnect
         client.loop_stop()
-        client.disconnect()
\ No newline at end of file
+        client.disconnect()
+        self._flush_influx(self.params['ExecutionId'])
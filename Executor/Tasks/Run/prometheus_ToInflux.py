@@ -1,11 +1,10 @@
 from prometheus_api_client import PrometheusConnect
-from Helper import Level, influx
+from Helper import Level
 from datetime import datetime
 import requests
 from requests.auth import HTTPBasicAuth
 from Settings import PROMETHEUSConfig
 from .to_influx import ToInfluxBase
-import time
 
 class PrometheusToInflux(ToInfluxBase):
 
@@ -100,8 +99,8 @@ class PrometheusToInflux(ToInfluxBase):
             try:
                 self._send_to_influx(measurement, flat_data, timestamp, executionId)
             except Exception as e:
-                if isinstance(e, influx.InfluxDBError) and e.response.status == 422:
-                    self.Log(Level.WARNING, f"Warning (PROMETHEUS): Unprocessable entity (422). Invalid data: {data}")
+                if self._is_rejected(e):
+                    self.Log(Level.WARNING, f"Warning (PROMETHEUS): InfluxDb rejected values sent by this task: {e}")
                 else:
                     self.Log(Level.ERROR, f"Failed to send data to InfluxDB (PROMETHEUS). Exception: {e}")
                     raise RuntimeError(f"Exiting due to unexpected error: {e}")
@@ -141,8 +140,7 @@ class PrometheusToInflux(ToInfluxBase):
          
         self.Log(Level.INFO, f"Connected to Prometheus at {URL_host}:{PORT_host}")
         
-        while not self.parent.ReadMilestone(stop) and not self.parent.stopRequested:
-            time.sleep(1)
+        self.parent.WaitMilestone(stop)
         end_time = datetime.now()
 
         # Process both range and custom queries
@@ -156,3 +154,4 @@ class PrometheusToInflux(ToInfluxBase):
 
         if queries_range is not None or queries_custom is not None:
             self.send_data_to_influx(data_dict, measurement, executionId)
+            self._flush_influx(executionId)
@@ -54,6 +54,7 @@ class SingleSliceCreationTime(Task):
         self.Log(Level.DEBUG, f"Payload: {payload}")
         self.Log(Level.INFO, f"Sending results to InfluxDb")
         InfluxDb.Send(payload)
+        InfluxDb.Flush(executionId)
 
         # TODO: Artificial wait until the slice is 'configured'
         # TODO: In the future the slice manager should also report this status
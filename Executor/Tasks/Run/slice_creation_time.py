@@ -122,6 +122,7 @@ class SliceCreationTime(Task):
         self.Log(Level.INFO, f"Sending results to InfluxDb")
         try:
             InfluxDb.Send(payload)
+            InfluxDb.Flush(executionId)
         except Exception as e:
             self.Log(Level.ERROR, f"Exception while sending payload: {e}")
             self.SetVerdictOnError()
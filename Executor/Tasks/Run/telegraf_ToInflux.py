@@ -1,7 +1,7 @@
 import socket
 import ssl
 import json
-from Helper import Level, influx
+from Helper import Level
 import time
 import threading
 from .to_influx import ToInfluxBase
@@ -47,8 +47,8 @@ class TelegrafToInflux(ToInfluxBase):
         try:
             self._send_to_influx(measurement, flattened_data, timestamp, self.executionId)
         except Exception as e:
-            if isinstance(e, influx.InfluxDBError) and e.response.status == 422:
-                self.Log(Level.WARNING, f"Warning (TELEGRAF): Unprocessable entity (422). Invalid data: {data}")
+            if self._is_rejected(e):
+                self.Log(Level.WARNING, f"Warning (TELEGRAF): InfluxDb rejected values sent by this task: {e}")
             else:
                 self.Log(Level.ERROR, f"Failed to send data to InfluxDB (TELEGRAF). Exception: {e}")
                 raise RuntimeError(f"Exiting due to unexpected error: {e}")
@@ -190,9 +190,9 @@ class TelegrafToInflux(ToInfluxBase):
         tcp_thread = threading.Thread(target=self.tcp_handler, args=(stop_event,))
         tcp_thread.start()
 
-        while not self.parent.ReadMilestone(stop) and not self.parent.stopRequested:
-            time.sleep(1)
+        self.parent.WaitMilestone(stop)
 
         stop_event.set()
         tcp_thread.join()  # Wait for the TCP handler thread to finish
+        self._flush_influx(self.executionId)
         self.Log(Level.INFO, "Telegraf task finished")
\ No newline at end of file
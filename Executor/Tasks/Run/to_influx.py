@@ -1,10 +1,11 @@
 from Task import Task
-from Helper import influx
+from Helper import influx, Level
 from datetime import timezone, datetime
 from typing import Union, Dict, Any
 from Settings import Config
 import requests
 import csv
+import gzip
 import time
 import re
 
@@ -17,6 +18,12 @@ class ToInfluxBase(Task):
     def sanitize_string(name: str) -> str:
         return re.sub(r'\W+', '_', name)
 
+    @staticmethod
+    def _is_rejected(e: Exception) -> bool:
+        """True if the database rejected some of the values. Values are written in the background, so the
+        error refers to values sent previously by the task, not necessarily the ones being sent."""
+        return isinstance(e, influx.InfluxDBError) and not influx.InfluxDb.isTransient(e)
+
     def _convert(self, value: Any) -> Union[int, float, bool, str, Dict[str, Any]]:
         if isinstance(value, str):
             try:
@@ -60,11 +67,21 @@ class ToInfluxBase(Task):
 
         influx.InfluxDb.Send(influx_payload)
 
+    def _flush_influx(self, executionId):
+        """Waits until the values sent by this task have been written, reporting any error as task failure."""
+        try:
+            influx.InfluxDb.Flush(executionId)
+        except Exception as e:
+            self.Log(Level.ERROR, f"Failed to write pending data to InfluxDB. Exception: {e}")
+            self.SetVerdictOnError()
+
     def _send_to_influx_CSV(self, measurement, csv_data, executionId):
         config = Config()
         url = f"http://{config.InfluxDb.Host}:{config.InfluxDb.Port}/api/v2/write"
         params_influx = {"org": config.InfluxDb.Org, "bucket": config.InfluxDb.Database, "precision": "s"}
         headers_influx = {"Authorization": f"Token {config.InfluxDb.Token}", "Content-Type": "text/plain; charset=utf-8"}
+        if config.InfluxDb.Gzip:
+            headers_influx["Content-Encoding"] = "gzip"
         user_id = self.parent.params.get('UserId')
 
         lines = csv_data.split("\n")
@@ -76,6 +93,7 @@ class ToInfluxBase(Task):
 
         reader = csv.reader(lines, delimiter=delimiter)
         column_names = next(reader)
+        influx_lines = []
 
         for row in reader:
             if len(row) != len(column_names):
@@ -99,9 +117,17 @@ class ToInfluxBase(Task):
                         safe_value = value.replace('"', '\\"')
                         fields.append(f'{key_cleaned}="{safe_value}"')
 
-            influx_line = f"{measurement},{tags} {','.join(fields)} {timestamp_influx}"
-            response = requests.post(url=url, params=params_influx, headers=headers_influx, data=influx_line)
-            response.raise_for_status()
+            influx_lines.append(f"{measurement},{tags} {','.join(fields)} {timestamp_influx}")
+
+        if len(influx_lines) == 0:
+            return
+
+        # All the rows of the message are sent in a single request
+        data = "\n".join(influx_lines).encode('utf-8')
+        if config.InfluxDb.Gzip:
+            data = gzip.compress(data, compresslevel=6)
+        response = requests.post(url=url, params=params_influx, headers=headers_influx, data=data)
+        response.raise_for_status()
 
     def _flatten_json(self, nested_json, parent_key='', sep='_', timestamp_key='timestamp', root_timestamp=None):
         data_with_timestamps = []
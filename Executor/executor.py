@@ -17,7 +17,7 @@ class Executor(ExecutorBase):
         self.SetStarted()
 
         tasks = self.Configuration.RunTasks
-        self.params['PreviousTaskLog'] = []
+        self.PublishValues({'PreviousTaskLog': []})
         self.Verdict = Verdict.NotSet
         for i, task in enumerate(tasks, start=1):
             if self.stopRequested:
@@ -35,8 +35,7 @@ class Executor(ExecutorBase):
                 taskInstance.Start()
 
                 # Add the values generated by the task to the global dictionary
-                self.params.update(taskInstance.Vault)
-                self.params['PreviousTaskLog'] = taskInstance.LogMessages
+                self.PublishValues({**taskInstance.Vault, 'PreviousTaskLog': taskInstance.LogMessages})
                 self.Verdict = Verdict.Max(self.Verdict, taskInstance.Verdict)
 
                 self.AddMessage(f"Task '{identifier}' finished with verdict '{taskInstance.Verdict.name}'",
@@ -27,6 +27,7 @@ class ExecutorBase(Child):
         self.Started = None
         self.Finished = None
         self.GeneratedFiles: List[str] = []
+        self.parent = None  # Cached by findParent
         self.Status = Status.Init
         self.Messages = []
         self.PerCent = 0
@@ -66,6 +67,7 @@ class ExecutorBase(Child):
         if percent is not None: self.PerCent = percent
         self.Messages.append(f'[{self.PerCent}%] {msg}')
         self.portal.UpdateExecutionData(self.ExecutionId, percent=self.PerCent, message=msg)
+        self.notifyChange()
 
     @property
     def LastMessage(self):
@@ -86,20 +88,73 @@ class ExecutorBase(Child):
             self.Status = status
         self.LogAndMessage(Level.INFO, f"Finished (status: {self.Status.name}, verdict: {self.Verdict.name})", percent)
 
+    @property
+    def Status(self) -> Status:
+        return self._status
+
+    @Status.setter
+    def Status(self, value: Status):
+        changed = value != getattr(self, '_status', None)
+        self._status = value
+        if changed: self.notifyChange()
+
+    @property
+    def Verdict(self) -> Verdict:
+        return self._verdict
+
+    @Verdict.setter
+    def Verdict(self, value: Verdict):
+        changed = value != getattr(self, '_verdict', None)
+        self._verdict = value
+        if changed: self.notifyChange()
+
     def findParent(self):  # Only running experiments should be able to use this method
+        if self.parent is None:
+            from Status import ExecutionQueue
+            self.parent = ExecutionQueue.Find(self.ExecutionId)
+        return self.parent
+
+    def notifyFinished(self):
         from Status import ExecutionQueue
-        return ExecutionQueue.Find(self.ExecutionId)
+        ExecutionQueue.Notify(self.ExecutionId)  # Advance the execution without waiting for the periodic update
+
+    def notifyChange(self):
+        """Increases the revision of the parent execution, so that clients are aware of the change of status,
+        verdict or messages of this executor"""
+        if not self.params.get('Deserialized', False):
+            parent = self.findParent()
+            if parent is not None:
+                parent.NotifyChange()
 
     def AddMilestone(self, milestone: str):
         parent = self.findParent()
         if parent is not None:
-            parent.Milestones.append(milestone)
+            parent.AddMilestone(milestone)
+
+    def PublishValues(self, values: Dict):
+        """Adds the values published by a task to the parameters of the execution, notifying the change"""
+        self.params.update(values)
+        parent = self.findParent()
+        if parent is not None:
+            parent.NotifyChange()
 
     def ReadMilestone(self, milestone: str) -> bool:
         parent = self.findParent()
         if parent is not None:
-            return milestone in parent.Milestones
+            return parent.HasMilestone(milestone)
+        return False
+
+    def WaitMilestone(self, milestone: str, timeout: Optional[float] = None) -> bool:
+        """Blocks until the milestone is reached, the executor is requested to stop (or the execution cancelled)
+        or the timeout expires. Returns whether the milestone has been reached"""
+        parent = self.findParent()
+        if parent is not None:
+            return parent.WaitMilestone(milestone, timeout, lambda: self.stopRequested)
         return False
+
+    def RequestStop(self):
+        super().RequestStop()
+        self.notifyChange()  # Wake up any task waiting for a milestone
     
     @property
     def RemoteApi(self):
@@ -2,14 +2,18 @@ from typing import Dict
 from .Tasks.PreRun import CheckResources, Instantiate, Coordinate
 from .executor_base import ExecutorBase
 from tempfile import TemporaryDirectory
-from time import sleep
 from Helper import Level
+from Interfaces import Management
 
 
 class PreRunner(ExecutorBase):
     def __init__(self, params: Dict, tempFolder: TemporaryDirectory = None):
         super().__init__(params, "PreRunner", tempFolder)
 
+    def RequestStop(self):
+        super().RequestStop()
+        Management.WakeUp(self)
+
     def Run(self):
         self.SetStarted()
 
@@ -24,30 +28,34 @@ class PreRunner(ExecutorBase):
         self.AddMessage("Coordination completed", 30)
 
         available = False
-        while not available:
-            parent = self.findParent()
-            if parent is None or parent.Cancelled:
-                # A cancelled experiment will usually be removed before reaching this point, hence the uncertainty
-                raise RuntimeError("Experiment errored, cancelled or not found. Aborting")
-
-            result = CheckResources(self.Log, self.ExecutionId, self.Configuration.Requirements,
-                                    self.Configuration.NetworkServices, self).Start()
-            available = result['Available']
-            feasible = result['Feasible']
-            if not feasible:
-                self.AddMessage('Instantiation impossible. Aborting')
-                self.Log(Level.ERROR,
-                         'Unable to continue. Not enough total resources on VIMs for network services deployment')
-                raise RuntimeError("Not enough VIM resources for experiment.")
-            if not available:
-                self.AddMessage('Not available')
-                sleep(10)
+        try:
+            while not available:
+                parent = self.findParent()
+                if parent is None or parent.Cancelled or self.stopRequested:
+                    # A cancelled experiment will usually be removed before reaching this point, hence the uncertainty
+                    raise RuntimeError("Experiment errored, cancelled or not found. Aborting")
+
+                result = CheckResources(self.Log, self.ExecutionId, self.Configuration.Requirements,
+                                        self.Configuration.NetworkServices, self).Start()
+                available = result['Available']
+                feasible = result['Feasible']
+                if not feasible:
+                    self.AddMessage('Instantiation impossible. Aborting')
+                    self.Log(Level.ERROR,
+                             'Unable to continue. Not enough total resources on VIMs for network services deployment')
+                    raise RuntimeError("Not enough VIM resources for experiment.")
+                if not available:
+                    self.AddMessage('Not available')
+                    Management.WaitForResources(self, timeout=10)  # Woken up as soon as resources are released
+        except Exception:
+            Management.CancelResourcesRequest(self)  # Do not block the executions waiting for the same resources
+            raise
 
         result = Instantiate(self.Log, self.TempFolder, self, self.Configuration.NetworkServices,
                              self.Configuration.Nest, self.Descriptor.Slice).Start()
 
         # Save the Slice Id (if any) for the Decommission step
-        self.params['DeployedSliceId'] = result.get('DeployedSliceId', None)
+        self.PublishValues({'DeployedSliceId': result.get('DeployedSliceId', None)})
 
         self.AddMessage('Instantiation completed', 80)
 
@@ -4,15 +4,17 @@ import platform
 
 from Executor import PreRunner, Executor, PostRunner, ExecutorBase, Verdict
 from Data import ExperimentDescriptor
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Callable
 from enum import Enum, unique
 from datetime import datetime, timezone
 from tempfile import TemporaryDirectory
+from threading import Condition
 from Helper import Serialize, Log
 from Settings import Config
 from Interfaces import PortalApi
 from Composer import Composer, PlatformConfiguration
-from os.path import join, abspath
+from os.path import join, abspath, dirname
+from concurrent.futures import ThreadPoolExecutor
 from Helper import Cli
 
 
@@ -37,9 +39,12 @@ class ExperimentRun:
         self._coarseStatus = CoarseStatus.Init
         self._dashboardUrl = None
         self.Cancelled = False
-        self.Milestones = []
+        self.milestones: Dict[str, None] = {}  # Used as an (insertion ordered) set, guarded by the condition
+        self.Revision = 0  # Increased on every change of status, messages, verdict, milestones or published values
+        self.condition = Condition()
         self.RemoteApi = None
         self.RemoteId = None
+        self.remoteResults = None
         self.Created = datetime.now(timezone.utc)
 
         if ExperimentRun.portal is None or ExperimentRun.grafana is None:
@@ -81,8 +86,7 @@ class ExperimentRun:
         if value != self._coarseStatus:
             self._coarseStatus = value
             ExperimentRun.portal.UpdateExecutionData(self.Id, status=value.name)
-            if value.name not in self.Milestones:
-                self.Milestones.append(value.name)
+            self.AddMilestone(value.name)
 
     @property
     def DashboardUrl(self):
@@ -147,10 +151,49 @@ class ExperimentRun:
         if self.CoarseStatus == CoarseStatus.PostRun: return self.PostRunner
         return None
 
+    @property
+    def Milestones(self) -> List[str]:
+        with self.condition:
+            return list(self.milestones)
+
+    def HasMilestone(self, milestone: str) -> bool:
+        return milestone in self.milestones
+
+    def AddMilestone(self, milestone: str):
+        with self.condition:
+            self.milestones[milestone] = None
+            self.Revision += 1
+            self.condition.notify_all()
+
+    def WaitMilestone(self, milestone: str, timeout: Optional[float] = None,
+                      stopRequested: Callable[[], bool] = lambda: False) -> bool:
+        """Waits until the milestone is reached, the execution is cancelled, `stopRequested` returns True or the
+        timeout expires. Returns whether the milestone has been reached"""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: milestone in self.milestones or self.Cancelled or stopRequested(), timeout)
+            return milestone in self.milestones
+
+    def NotifyChange(self):
+        """Wakes up any client waiting for changes on this execution (see WaitForChange)"""
+        with self.condition:
+            self.Revision += 1
+            self.condition.notify_all()
+
+    def WaitForChange(self, revision: int, timeout: float) -> int:
+        """Waits until the execution changes from the given revision or the timeout expires, returning the
+        current revision"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.Revision != revision, timeout)
+            return self.Revision
+
     def Cancel(self):
+        self.Cancelled = True
         current = self.CurrentChild
         if current is not None:
             current.RequestStop()
+        if self.remoteResults is not None:
+            self.remoteResults.Stop(wait=False)
         self.CoarseStatus = CoarseStatus.Cancelled
 
         device = self.Params.get("DeviceId", None)
@@ -166,6 +209,10 @@ class ExperimentRun:
 
     def Run(self):
         self.CoarseStatus = CoarseStatus.Run
+        if self.RemoteId is not None and self.IsRemoteMaster and Config().InfluxDb.Enabled:
+            from .remote_results import RemoteResults
+            self.remoteResults = RemoteResults.FromConfig(self.Id, self.RemoteApi, self.RemoteId)
+            self.remoteResults.Start()
         self.Executor.Start()
 
     def PostRun(self):
@@ -201,40 +248,65 @@ class ExperimentRun:
                 self.handleExecutionEnd()
 
     def handleExecutionEnd(self):
-        allFiles = self.GeneratedFiles
-
-        # Handle results from the remote side
-        if self.RemoteId is not None and self.IsRemoteMaster:
-            if Config().InfluxDb.Enabled:
-                from Helper import InfluxDb, InfluxPayload
-                influx = InfluxDb()
-                Log.I(f'Trying to retrieve results from remote side database.')
-                results: List[InfluxPayload] = self.RemoteApi.GetResults(self.RemoteId)
-                Log.D(f'Retrieved {len(results)} payloads: {([p.Measurement for p in results])}')
-                for payload in results:
-                    payload.Measurement = f"Remote_{payload.Measurement}"
-                    payload.Tags['ExecutionId'] = str(self.ExecutionId)
-                    influx.Send(payload)
-                    Log.D(f"Sent '{payload.Measurement}' payload to database")
-
-            Log.I(f'Trying to retrieve remote side files.')
-            file = self.RemoteApi.GetFiles(self.RemoteId, self.TempFolder.name)
-            if file is not None:
-                allFiles.append(file)
-            else:
-                Log.W("Could not retrieve remote side files.")
+        """Collects the results of the execution. The retrieval of the remote results and files, the compression
+        of the local files and the generation of the dashboard are independent, and run concurrently"""
+        start = datetime.now(timezone.utc)
+        isRemote = self.RemoteId is not None and self.IsRemoteMaster
+        path = join(abspath(Config().ResultsFolder), f"{self.Id}.zip")
 
-        # Compress all generated files
+        try:
+            with ThreadPoolExecutor(max_workers=3, thread_name_prefix=f'ExecutionEnd{self.Id}') as pool:
+                stages = [pool.submit(self.createDashboard)]
+                remoteFile = None
+                if isRemote:
+                    if Config().InfluxDb.Enabled:
+                        stages.append(pool.submit(self.retrieveRemoteResults))
+                    Log.I(f'Trying to retrieve remote side files.')
+                    remoteFile = pool.submit(self.RemoteApi.GetFiles, self.RemoteId, self.TempFolder.name)
+
+                # Compress the local files while the remote ones are retrieved, then add them to the same file
+                self.compressFiles(self.GeneratedFiles, path)
+                if remoteFile is not None:
+                    file = remoteFile.result()
+                    if file is not None:
+                        self.compressFiles([file], path, append=True)
+                    else:
+                        Log.W("Could not retrieve remote side files.")
+
+                for stage in stages:
+                    stage.result()
+        except Exception as e:
+            Log.E(f"Exception while handling execution end ({self.Id}): {e}")
+        finally:
+            elapsed = (datetime.now(timezone.utc) - start).total_seconds()
+            Log.D(f"Results of execution {self.Id} collected in {elapsed:.1f}s")
+            Log.D(f"Clearing temp folder for execution {self.Id}")
+            self.TempFolder.cleanup()
+
+    def retrieveRemoteResults(self):
+        from Helper import InfluxDb
+        from .remote_results import RemoteResults
+        Log.I(f'Trying to retrieve results from remote side database.')
+        remoteResults = self.remoteResults or RemoteResults.FromConfig(self.Id, self.RemoteApi, self.RemoteId)
+        remoteResults.Stop()
+        try:
+            count = remoteResults.Sync()
+            Log.D(f'Retrieved {count} payloads from the remote side '
+                  f'({remoteResults.Payloads - count} retrieved while running)')
+            InfluxDb.Flush(self.ExecutionId)
+        except Exception as e:
+            Log.E(f"Exception while sending remote results to the database: {e}")
+
+    def compressFiles(self, files: List[str], path: str, append: bool = False):
         try:
             from Helper import Compress, IO
-            Log.I(f"Experiment generated files: {allFiles}")
-            folder = abspath(Config().ResultsFolder)
-            IO.EnsureFolder(folder)
-            path = join(folder, f"{self.Id}.zip")
-            Compress.Zip(allFiles, path, flat=True)
+            Log.I(f"Experiment generated files: {files}")
+            IO.EnsureFolder(dirname(path))
+            Compress.Zip(files, path, flat=True, append=append)
         except Exception as e:
             Log.E(f"Exception while compressing experiment files ({self.Id}): {e}")
 
+    def createDashboard(self):
         # Try to create the dashboard even in case of error, there might be results to display
         try:
             Log.D(f"Automatically generating panels from log (AutoGraph) {self.Id}")
@@ -250,10 +322,7 @@ class ExperimentRun:
             else:
                 Log.D(f"Execution {self.Id} aborted during Pre-Run, skipping dashboard generation")
         except Exception as e:
-            Log.E(f"Exception while handling execution end ({self.Id}): {e}")
-        finally:
-            Log.D(f"Clearing temp folder for execution {self.Id}")
-            self.TempFolder.cleanup()
+            Log.E(f"Exception while generating the dashboard ({self.Id}): {e}")
 
     def Serialize(self) -> Dict:
         data = {
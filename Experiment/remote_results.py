@@ -0,0 +1,77 @@
+from threading import Thread, Event, Lock
+from typing import Dict, Optional
+from Helper import Log
+from Settings import Config
+
+
+class RemoteResults:
+    """Retrieves the results of the remote side of a distributed execution and forwards them to the local
+    database. While the execution is running, a background thread periodically requests only the points that
+    are newer than the last ones received for each measurement, so that only a small tail is left to transfer
+    once the execution finishes.
+
+    Cursors are moved back by `overlap` seconds on each request, so that points written with a small delay on
+    the remote side (e.g. batched by the remote writer) are not lost. Points received twice are overwritten by
+    the database, since their measurement, tags and timestamp are the same."""
+
+    def __init__(self, executionId: int, remoteApi, remoteId: int, interval: float, overlap: float):
+        self.executionId = executionId
+        self.remoteApi = remoteApi
+        self.remoteId = remoteId
+        self.interval = interval
+        self.overlap = int(overlap * 1e9)
+        self.cursors: Dict[str, int] = {}  # Dict[<Measurement>: <Latest timestamp received (ns)>]
+        self.lock = Lock()
+        self.stop = Event()
+        self.thread: Optional[Thread] = None
+        self.Payloads = 0
+
+    def Start(self):
+        if self.interval > 0 and self.thread is None:
+            self.thread = Thread(target=self._run, name=f"RemoteResults{self.executionId}", daemon=True)
+            self.thread.start()
+
+    def Stop(self, wait: bool = True):
+        self.stop.set()
+        if wait and self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while not self.stop.wait(self.interval):
+            if self.remoteApi.IncrementalResults is False:
+                Log.W(f"Remote side of execution {self.executionId} does not support incremental results, "
+                      f"results will be retrieved once the execution finishes")
+                return
+            try:
+                count = self.Sync()
+                Log.D(f"Retrieved {count} payloads from the remote side of execution {self.executionId}")
+            except Exception as e:
+                Log.W(f"Exception while retrieving partial results of execution {self.executionId}: {e}")
+
+    def Sync(self) -> int:
+        """Retrieves the points newer than the current cursors and sends them to the database. Cursors are only
+        advanced if all the results were received, returns the number of forwarded payloads"""
+        from Helper import InfluxDb
+        with self.lock:
+            since = {measurement: max(0, cursor - self.overlap) for measurement, cursor in self.cursors.items()}
+            cursors = dict(self.cursors)
+            count = 0
+            for payload in self.remoteApi.StreamResults(self.remoteId, since):
+                if payload.PointCount != 0:
+                    latest = int(payload.Timestamps.max())
+                    cursors[payload.Measurement] = max(cursors.get(payload.Measurement, latest), latest)
+                payload.Measurement = f"Remote_{payload.Measurement}"
+                payload.Tags['ExecutionId'] = str(self.executionId)
+                InfluxDb.Send(payload)
+                count += 1
+
+            if self.remoteApi.ResultsComplete:
+                self.cursors = cursors
+            self.Payloads += count
+            return count
+
+    @classmethod
+    def FromConfig(cls, executionId: int, remoteApi, remoteId: int) -> 'RemoteResults':
+        config = Config().EastWest
+        return RemoteResults(executionId, remoteApi, remoteId, config.ResultSyncInterval, config.ResultSyncOverlap)
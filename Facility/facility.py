@@ -3,15 +3,26 @@ from .action_information import ActionInformation
 from .dashboard_panel import DashboardPanel
 from .resource import Resource
 from Helper import Log, Level
-from typing import Dict, List, Tuple, Optional
-from threading import Lock
+from typing import Dict, List, Tuple, Optional, Deque, Callable
+from threading import Lock, Event
+from bisect import insort
+from collections import deque
+from time import monotonic
 from Utils import synchronized
 from .Loader import Loader, ResourceLoader, ScenarioLoader, UeLoader, TestCaseLoader
 
 
 class Facility:
     lock = Lock()
-    requesters: Dict[str, List[str]] = {}
+    requesters: Dict[int, List[str]] = {}  # Resources requested by each waiting execution
+    waiters: Dict[str, List[int]] = {}  # Executions waiting for each resource, oldest first
+    events: Dict[int, Event] = {}  # Set when a waiting execution should retry
+
+    HISTORY_SIZE = 20
+    clock: Callable[[], float] = monotonic
+    lockedAt: Dict[int, float] = {}  # When each active execution locked its resources
+    predictedEnd: Dict[int, Optional[float]] = {}  # When each active execution is expected to release them
+    history: Dict[Tuple[str, ...], Deque[float]] = {}  # Latest durations of each combination of test cases
     activeExperiments: List[str] = []
     activeExclusive: Optional[str] = None
 
@@ -190,6 +201,12 @@ class Facility:
 
         if owner.ExecutionId not in cls.requesters.keys():
             cls.requesters[executor] = resourceIds
+            cls.events[executor] = Event()
+            for id in resourceIds:
+                insort(cls.waiters.setdefault(id, []), executor)
+        else:
+            # Cleared before checking, under the lock: any later release sets it again (see WaitForResources)
+            cls.events[executor].clear()
 
         # For exclusive experiments check if something else is running
         if exclusive and len(cls.activeExperiments) != 0:
@@ -207,13 +224,13 @@ class Facility:
                 Log.D(f"Resources denied to {executor}: {resource.Id} already locked by {resource.Owner.ExecutionId}")
                 return False
 
-        # Check if some earlier experiment is requesting the same resources
-        for key, values in cls.requesters.items():
-            if key < executor:  # Check only older executors
-                intersect = list(set(values) & set(resourceIds))
-                if len(intersect) != 0:
-                    Log.D(f"Resources denied to {executor} due to conflict with {key} ({intersect})")
-                    return False
+        # Check if some earlier experiment is waiting for the same resources
+        older = sorted({waiter for id in resourceIds for waiter in cls.waiters[id] if waiter < executor})
+        if len(older) != 0:
+            if not (cls.isBackfilling() and cls.canBackfill(owner, older)):
+                Log.D(f"Resources denied to {executor} due to conflict with {older}")
+                return False
+            Log.I(f"Backfilling execution {executor} ahead of {older}")
 
         # Try to lock all the required resources
         for id in resourceIds:
@@ -228,6 +245,12 @@ class Facility:
         if exclusive:
             cls.activeExclusive = owner.ExecutionId
         cls.activeExperiments.append(owner.ExecutionId)
+        cls.removeWaiter(executor)
+
+        now = cls.clock()
+        duration = cls.PredictedDuration(owner)
+        cls.lockedAt[executor] = now
+        cls.predictedEnd[executor] = None if duration is None else now + duration
 
         return True
 
@@ -235,15 +258,134 @@ class Facility:
     @synchronized(lock)
     def ReleaseResources(cls, ids: List[str], owner: 'ExecutorBase'):
         execution = owner.ExecutionId
-        _ = cls.requesters.pop(execution, None)
+        cls.removeWaiter(execution)
         cls._releaseResources(ids)
 
-        if execution == cls.activeExclusive:
+        lockedAt = cls.lockedAt.pop(execution, None)
+        cls.predictedEnd.pop(execution, None)
+        if lockedAt is not None and owner.Descriptor is not None:
+            key = cls.historyKey(owner.Descriptor)
+            cls.history.setdefault(key, deque(maxlen=cls.HISTORY_SIZE)).append(cls.clock() - lockedAt)
+
+        wasExclusive = (execution == cls.activeExclusive)
+        if wasExclusive:
             cls.activeExclusive = None
         try:
             cls.activeExperiments.remove(execution)
         except ValueError: pass
 
+        # Wake up the next execution waiting for each resource, or all of them if the exclusivity has changed
+        # When backfilling, younger executions may be able to use the resources if the first one cannot start yet
+        if wasExclusive or len(cls.activeExperiments) == 0:
+            cls.wake(list(cls.requesters.keys()))
+        elif cls.isBackfilling():
+            cls.wake([waiter for id in ids for waiter in cls.waiters.get(id, [])])
+        else:
+            cls.wake([cls.waiters[id][0] for id in ids if len(cls.waiters.get(id, [])) != 0])
+
+    @classmethod
+    def isBackfilling(cls) -> bool:
+        try:
+            from Settings import Config  # Delayed, to avoid cyclic imports
+            return Config().ResourceScheduler == 'Backfill'
+        except Exception:
+            return False
+
+    @staticmethod
+    def historyKey(descriptor) -> Tuple[str, ...]:
+        return tuple(sorted(descriptor.TestCases))
+
+    @classmethod
+    def PredictedDuration(cls, owner: 'ExecutorBase') -> Optional[float]:
+        """Seconds that the execution is expected to keep its resources: the largest of the ReservationTime of the
+        descriptor and the average duration of the latest executions of the same test cases. None if unknown"""
+        descriptor = owner.Descriptor
+        if descriptor is None:
+            return None
+        durations = []
+        try:
+            reservation = descriptor.Duration
+        except KeyError:  # Descriptor without a reservation
+            reservation = None
+        if reservation:
+            durations.append(reservation * 60)
+        history = cls.history.get(cls.historyKey(descriptor), None)
+        if history:
+            durations.append(sum(history) / len(history))
+        return max(durations) if len(durations) != 0 else None
+
+    @classmethod
+    def earliestStart(cls, executionId: int) -> Optional[float]:
+        """Time at which all the resources requested by a waiting execution are expected to be released, None if
+        any of the executions that hold them has an unknown duration"""
+        start = cls.clock()
+        for id in cls.requesters.get(executionId, []):
+            resource = cls.resources.get(id, None)
+            if resource is not None and resource.Locked:
+                end = cls.predictedEnd.get(resource.Owner.ExecutionId, None)
+                if end is None:
+                    return None
+                start = max(start, end)
+        return start
+
+    @classmethod
+    def canBackfill(cls, owner: 'ExecutorBase', older: List[int]) -> bool:
+        """A younger execution can use resources requested by older ones if it is expected to finish before any
+        of them could start, so that none of them is delayed"""
+        duration = cls.PredictedDuration(owner)
+        if duration is None:
+            return False
+        end = cls.clock() + duration
+        for executionId in older:
+            start = cls.earliestStart(executionId)
+            if start is None or end > start:
+                return False
+        return True
+
+    @classmethod
+    def WaitForResources(cls, owner: 'ExecutorBase', timeout: float) -> bool:
+        """Blocks until some of the resources requested by the execution (see TryLockResources) are released,
+        the execution is woken up (see WakeUp) or the timeout expires. Returns False if the timeout expired.
+        The event is only cleared by TryLockResources, so a release that happens after the last check (even
+        while this method is returning) is never lost."""
+        with cls.lock:
+            event = cls.events.setdefault(owner.ExecutionId, Event())
+        if owner.stopRequested:  # The wake up of RequestStop may have been cleared by TryLockResources
+            return True
+        return event.wait(timeout)
+
+    @classmethod
+    def WakeUp(cls, executionId: int):
+        with cls.lock:
+            cls.wake([executionId])
+
+    @classmethod
+    @synchronized(lock)
+    def CancelRequest(cls, owner: 'ExecutorBase'):
+        """Removes the execution from the wait queues of the resources, used when it will not try to lock
+        them anymore"""
+        cls.removeWaiter(owner.ExecutionId)
+
+    @classmethod
+    def removeWaiter(cls, executionId: int):
+        for id in cls.requesters.pop(executionId, []):
+            queue = cls.waiters.get(id, [])
+            if executionId in queue:
+                wasFirst = (queue[0] == executionId)
+                queue.remove(executionId)
+                if wasFirst and len(queue) != 0:
+                    cls.wake([queue[0]])
+            if len(queue) == 0:
+                cls.waiters.pop(id, None)
+        cls.events.pop(executionId, None)
+
+    @classmethod
+    def wake(cls, executionIds: List[int]):
+        for executionId in executionIds:
+            event = cls.events.get(executionId, None)
+            if event is not None:
+                event.set()
+
     @classmethod
     def _releaseResources(cls, ids: List[str]):
         for resource in ids:
@@ -5,7 +5,8 @@ from .serialize import Serialize
 from .tap_executor import Tap
 from .cli_executor import Cli
 from .dashboard_generator import DashboardGenerator
-from .influx import InfluxDb, InfluxPayload, InfluxPoint
+from .influx import InfluxDb, InfluxPayload, InfluxPoint, ColumnarPayload
+from .binary_frames import BinaryFrames
 from .compress import Compress
 from .io import IO
 from .autograph import AutoGraph
\ No newline at end of file
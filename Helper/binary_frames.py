@@ -0,0 +1,40 @@
+from typing import Dict, Iterator, Tuple, Union
+import json
+import struct
+
+
+class BinaryFrames:
+    """Length-prefixed frames, each one with a JSON header and an optional binary body. Every frame starts with the
+    sizes of both parts (two big-endian uint32), followed by the UTF-8 encoded header and the body."""
+
+    Mimetype = 'application/vnd.elcm.columnar'
+    prefix = struct.Struct('>II')
+
+    @classmethod
+    def Encode(cls, header: Dict, body: bytes = b'') -> bytes:
+        encoded = json.dumps(header).encode('utf-8')
+        return cls.prefix.pack(len(encoded), len(body)) + encoded + body
+
+    @classmethod
+    def Read(cls, stream) -> Iterator[Tuple[Dict, Union[bytes, memoryview]]]:
+        """Yields (header, body) for each frame of a file-like object (anything with a `read(amount)` method)"""
+        while True:
+            sizes = cls.readExactly(stream, cls.prefix.size, allowEof=True)
+            if sizes is None:
+                return
+            headerSize, bodySize = cls.prefix.unpack(sizes)
+            header = json.loads(cls.readExactly(stream, headerSize).decode('utf-8'))
+            body = cls.readExactly(stream, bodySize) if bodySize != 0 else b''
+            yield header, body
+
+    @staticmethod
+    def readExactly(stream, amount: int, allowEof: bool = False):
+        buffer = bytearray()
+        while len(buffer) < amount:
+            data = stream.read(amount - len(buffer))
+            if not data:
+                if allowEof and len(buffer) == 0:
+                    return None
+                raise EOFError(f"Truncated frame ({len(buffer)} of {amount} bytes)")
+            buffer += data
+        return bytes(buffer)
@@ -51,6 +51,7 @@ class Child:
             finally:
                 self.hasFinished = True
                 Log.CloseLogFile(self.name)
+                self.notifyFinished()
 
         if self.tempFolderIsExternal:
             _innerRun()
@@ -64,6 +65,10 @@ class Child:
     def Run(self):
         raise NotImplementedError()
 
+    def notifyFinished(self):
+        """Called from the thread of the child once Run has finished (successfully or not)"""
+        pass
+
     def RetrieveLog(self, tail: int = None) -> List[str]:
         if not self.hasStarted: return []
         return Log.RetrieveLog(self.LogFile, tail)
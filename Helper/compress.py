@@ -5,8 +5,9 @@ from os.path import abspath, dirname, basename
 
 class Compress:
     @staticmethod
-    def Zip(files: List[str], output: str, flat: bool = False) -> None:
-        output = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED)
+    def Zip(files: List[str], output: str, flat: bool = False, append: bool = False) -> None:
+        """Compresses the files into `output`. If `append` is True the files are added to the existing archive"""
+        output = zipfile.ZipFile(output, 'a' if append else 'w', zipfile.ZIP_DEFLATED)
 
         files = [abspath(file) for file in files]
         rootFolder = Compress.getRootPath(files)
@@ -3,40 +3,92 @@ from influxdb_client import InfluxDBClient as InfluxDBClient_v2
 from influxdb_client import Point
 from requests import RequestException
 from influxdb_client.client.exceptions import InfluxDBError
-from threading import local, RLock
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
+from time import perf_counter, monotonic
 from Settings import Config
-from typing import Dict, List, Union
-from datetime import datetime, timezone
-from csv import DictWriter, DictReader, Dialect, QUOTE_NONE
+from typing import Dict, List, Optional, Union, Iterator, Tuple
+from datetime import datetime, timezone, timedelta
+from urllib3 import HTTPConnectionPool, make_headers
+from urllib3.exceptions import HTTPError
+from math import isfinite
+from csv import DictWriter, QUOTE_NONE, writer
 import re
 import requests
+from urllib.parse import quote
 import enum
+import gzip
+import json
 from Helper import Log
+from .influx_writer import InfluxWriter
+from .influx_spool import InfluxSpool
 import os
 import pandas as pd
-from dateutil.parser import isoparse
+import numpy as np
 
-class BatchingCallback(object):
+class Versions(enum.Enum):
+    V1 = "1"
+    V2 = "v2"
 
-    def __init__(self):
-        self.last_error = None
+# Line protocol escaping (https://docs.influxdata.com/influxdb/v2/reference/syntax/line-protocol/#special-characters)
+_measurementEscape = str.maketrans({',': r'\,', ' ': r'\ ', '\n': r'\n'})
+_keyEscape = str.maketrans({',': r'\,', '=': r'\=', ' ': r'\ ', '\n': r'\n'})
+_stringEscape = str.maketrans({'"': r'\"', '\\': r'\\'})
 
-    def error(self, conf: (str, str, str), data: str, exception: InfluxDBError):
-        self.last_error = exception
 
-class ThreadLocalBatchingCallback:
+_epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_epochNaive = datetime(1970, 1, 1)
+_microsecond = timedelta(microseconds=1)
 
-    def __init__(self):
-        self._storage = local()
 
-    def get_callback(self):
-        if not hasattr(self._storage, 'callback'):
-            self._storage.callback = BatchingCallback()
-        return self._storage.callback
+def ToNanoseconds(time: datetime) -> int:
+    """Integer nanoseconds since the epoch. Naive datetimes are considered UTC (as in the serialized payloads)."""
+    return ((time - (_epochNaive if time.tzinfo is None else _epoch)) // _microsecond) * 1000
+
+
+def _lineProtocolField(value) -> Optional[str]:
+    kind = type(value)
+    if kind is float:
+        return repr(value) if isfinite(value) else None  # NaN and infinite values are not supported
+    if kind is bool:
+        return 'true' if value else 'false'
+    if kind is int:
+        return f'{value}i'
+    if value is None:
+        return None
+    return f'"{str(value).translate(_stringEscape)}"'
+
+
+def _tagSet(tags: Dict[str, str]) -> str:
+    return ''.join(f',{str(key).translate(_keyEscape)}={str(value).translate(_keyEscape)}'
+                   for key, value in sorted(tags.items()) if value is not None and str(value) != '')
+
+
+def _toColumn(values: List) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Converts a list of values into a typed array, plus a mask of missing (None) values if there is any"""
+    present = [value for value in values if value is not None]
+    kinds = set(map(type, present))
+    if len(kinds) != 0 and kinds <= {bool}:
+        dtype, default = np.bool_, False
+    elif len(kinds) != 0 and kinds <= {int}:
+        dtype, default = np.int64, 0
+    elif kinds <= {int, float}:
+        dtype, default = np.float64, np.nan
+    else:
+        dtype, default = object, None
+
+    if len(present) == len(values):
+        mask = None
+    else:
+        mask = np.fromiter((value is None for value in values), dtype=np.bool_, count=len(values))
+        values = [default if value is None else value for value in values]
+    try:
+        return np.array(values, dtype=dtype), mask
+    except OverflowError:  # Integers that do not fit in 64 bits
+        return np.array(values, dtype=object), mask
 
-class Versions(enum.Enum):
-    V1 = "1"
-    V2 = "v2"
 
 class InfluxPoint:
     def __init__(self, time: datetime):
@@ -76,90 +128,332 @@ class InfluxPayload:
                 data.append(p)
         return data
 
+    @property
+    def PointCount(self) -> int:
+        return len(self.Points)
+
+    @property
+    def TagSet(self) -> str:
+        """Escaped tag set (including the leading comma), shared by all the points of the payload."""
+        return _tagSet(self.Tags)
+
+    @property
+    def LineProtocol(self) -> bytes:
+        prefix = self.Measurement.translate(_measurementEscape) + self.TagSet
+        keys: Dict[str, str] = {}  # Escaped field keys, usually shared by all points
+        lines = []
+        for point in self.Points:
+            fields = []
+            for key, value in point.Fields.items():
+                value = _lineProtocolField(value)
+                if value is not None:
+                    escaped = keys.get(key)
+                    if escaped is None:
+                        escaped = keys[key] = key.translate(_keyEscape)
+                    fields.append(f'{escaped}={value}')
+            if len(fields) != 0:
+                lines.append(f'{prefix} {",".join(fields)} {ToNanoseconds(point.Time)}')
+        return '\n'.join(lines).encode('utf-8')
+
     def __str__(self):
         return f"InfluxPayload['{self.Measurement}' - Tags: {self.Tags} - " + \
             f"Points: [{', '.join(str(p) for p in self.Points)}]]"
 
     @classmethod
-    def FromEastWestData(cls, measurement: str, tags: Dict[str, str], header: List[str], points: List):
+    def FromEastWestData(cls, measurement: str, tags: Dict[str, str], header: List[str], points: List,
+                         utc: bool = False):
         res = InfluxPayload(measurement)
         res.Tags = tags
         for point in points:
             timestamp, values = point
-            influxPoint = InfluxPoint(datetime.fromtimestamp(timestamp))
+            influxPoint = InfluxPoint(datetime.fromtimestamp(timestamp, timezone.utc) if utc
+                                      else datetime.fromtimestamp(timestamp))
             for key, value in zip(header, values):
                 influxPoint.Fields[key] = value
             res.Points.append(influxPoint)
         return res
 
-class baseDialect(Dialect):
-    delimiter = ','
-    escapechar = None
-    doublequote = False
-    skipinitialspace = False
-    lineterminator = '\r\n'
-    quotechar = '"'
-    quoting = QUOTE_NONE
+class ColumnarPayload:
+    """Array-backed equivalent of InfluxPayload, for large amounts of points. Timestamps are kept as int64
+    nanoseconds and each field as a typed array, with an optional mask (True = missing value) per field.
+    Slicing a ColumnarPayload returns a new payload that shares the underlying arrays."""
+
+    def __init__(self, measurement: str, timestamps: Optional[np.ndarray] = None,
+                 columns: Optional[Dict[str, np.ndarray]] = None, masks: Optional[Dict[str, np.ndarray]] = None):
+        self.Measurement = re.sub(r'\W+', '_', measurement)
+        self.Tags: Dict[str, str] = {}
+        self.Timestamps: np.ndarray = np.empty(0, dtype=np.int64) if timestamps is None \
+            else np.asarray(timestamps, dtype=np.int64)
+        self.Columns: Dict[str, np.ndarray] = {} if columns is None else columns
+        self.Masks: Dict[str, np.ndarray] = {} if masks is None else masks
+        self.Version = None
+
+    @property
+    def PointCount(self) -> int:
+        return len(self.Timestamps)
+
+    def __getitem__(self, item: slice) -> 'ColumnarPayload':
+        if not isinstance(item, slice):
+            raise TypeError("ColumnarPayload only supports slicing")
+        res = ColumnarPayload(self.Measurement, self.Timestamps[item],
+                              {key: values[item] for key, values in self.Columns.items()},
+                              {key: mask[item] for key, mask in self.Masks.items()})
+        res.Measurement = self.Measurement
+        res.Tags = dict(self.Tags)
+        res.Version = self.Version
+        return res
+
+    def Slices(self, size: int) -> Iterator['ColumnarPayload']:
+        for start in range(0, self.PointCount, size):
+            yield self[start:start + size]
+
+    def Missing(self, key: str) -> np.ndarray:
+        mask = self.Masks.get(key, None)
+        return np.zeros(self.PointCount, dtype=np.bool_) if mask is None else mask
+
+    @property
+    def Datetimes(self) -> List[datetime]:
+        return [_epoch + timedelta(microseconds=ns // 1000) for ns in self.Timestamps.tolist()]
+
+    @property
+    def Points(self) -> List[InfluxPoint]:
+        """Row-based view of the payload, for compatibility with code that expects InfluxPayload.Points"""
+        res = [InfluxPoint(time) for time in self.Datetimes]
+        for key, values in self.Columns.items():
+            missing = self.Masks.get(key, None)
+            for index, value in enumerate(values.tolist()):
+                if missing is None or not missing[index]:
+                    res[index].Fields[key] = value
+        return res
+
+    def ToPayload(self) -> InfluxPayload:
+        res = InfluxPayload(self.Measurement)
+        res.Measurement = self.Measurement
+        res.Tags = dict(self.Tags)
+        res.Points = self.Points
+        res.Version = self.Version
+        return res
+
+    @property
+    def Serialized(self):
+        return self.ToPayload().Serialized
+
+    @property
+    def TagSet(self) -> str:
+        return _tagSet(self.Tags)
+
+    @property
+    def LineProtocol(self) -> bytes:
+        if self.PointCount == 0: return b''
+
+        prefix = self.Measurement.translate(_measurementEscape) + self.TagSet
+        columns = []
+        for key, values in self.Columns.items():
+            name = key.translate(_keyEscape)
+            missing = self.Masks.get(key, None)
+            kind = values.dtype.kind
+            if kind == 'f':
+                texts = [f'{name}={value!r}' for value in values.tolist()]
+                invalid = ~np.isfinite(values)  # NaN and infinite values are not supported
+                missing = invalid if missing is None else (missing | invalid)
+            elif kind == 'b':
+                texts = [f'{name}=true' if value else f'{name}=false' for value in values.tolist()]
+            elif kind in 'iu':
+                texts = [f'{name}={value}i' for value in values.tolist()]
+            else:
+                texts = [f'{name}={text}' if text is not None else None
+                         for text in map(_lineProtocolField, values.tolist())]
+            if missing is not None:
+                for index in np.flatnonzero(missing).tolist():
+                    texts[index] = None
+            columns.append(texts)
+
+        lines = []
+        for timestamp, row in zip(self.Timestamps.tolist(), zip(*columns)):
+            fields = ','.join(field for field in row if field is not None)
+            if len(fields) != 0:
+                lines.append(f'{prefix} {fields} {timestamp}')
+        return '\n'.join(lines).encode('utf-8')
+
+    def __str__(self):
+        return f"ColumnarPayload['{self.Measurement}' - Tags: {self.Tags} - " + \
+            f"Points: {self.PointCount} - Fields: {list(self.Columns.keys())}]"
+
+    @classmethod
+    def FromPayload(cls, payload: InfluxPayload) -> 'ColumnarPayload':
+        keys = {}
+        for point in payload.Points:
+            keys.update(dict.fromkeys(point.Fields.keys()))
+
+        res = ColumnarPayload(payload.Measurement, [ToNanoseconds(point.Time) for point in payload.Points])
+        for key in keys:
+            values, mask = _toColumn([point.Fields.get(key, None) for point in payload.Points])
+            res.Columns[key] = values
+            if mask is not None:
+                res.Masks[key] = mask
+        res.Measurement = payload.Measurement
+        res.Tags = dict(payload.Tags)
+        res.Version = payload.Version
+        return res
+
+    @classmethod
+    def FromEastWestData(cls, measurement: str, tags: Dict[str, str], header: List[str], points: List,
+                         utc: bool = False):
+        """Timestamps are seconds since the epoch. Older peers (entries without the 'utc' flag) send the UTC time
+        of each point interpreted as local time, these are converted back as the original InfluxPayload did"""
+        if utc:
+            seconds = np.array([point[0] for point in points], dtype=np.float64)
+            timestamps = np.round(seconds * 1e6).astype(np.int64) * 1000
+        else:
+            timestamps = np.array([ToNanoseconds(datetime.fromtimestamp(point[0])) for point in points],
+                                  dtype=np.int64)
+        res = ColumnarPayload(measurement, timestamps)
+        for index, key in enumerate(header):
+            values, mask = _toColumn([point[1][index] for point in points])
+            res.Columns[key] = values
+            if mask is not None:
+                res.Masks[key] = mask
+        res.Tags = tags
+        return res
+
+    @property
+    def BinaryColumns(self) -> Tuple[List[Dict], bytes]:
+        """Compact encoding of the timestamps and columns for the east/west interface. Returns the description of
+        each column (name, numpy dtype, size in bytes and whether a mask follows) and the concatenated buffers:
+        the timestamps (little-endian int64 nanoseconds), then each column followed by its mask (if any).
+        Columns of non-numeric types are encoded as a JSON list (dtype 'json')."""
+        buffers = [self.Timestamps.astype('<i8', copy=False).tobytes()]
+        columns = []
+        for key, values in self.Columns.items():
+            if values.dtype.kind in 'biuf':
+                data = values.astype(values.dtype.newbyteorder('<'), copy=False).tobytes()
+                dtype = values.dtype.newbyteorder('<').str
+            else:
+                data = json.dumps(values.tolist(), default=str).encode('utf-8')
+                dtype = 'json'
+            mask = self.Masks.get(key, None)
+            columns.append({'name': key, 'dtype': dtype, 'size': len(data), 'masked': mask is not None})
+            buffers.append(data)
+            if mask is not None:
+                buffers.append(mask.astype(np.bool_, copy=False).tobytes())
+        return columns, b''.join(buffers)
+
+    @classmethod
+    def FromBinaryColumns(cls, measurement: str, tags: Dict[str, str], count: int, columns: List[Dict],
+                          data: Union[bytes, memoryview]) -> 'ColumnarPayload':
+        """Inverse of BinaryColumns. Numeric columns and masks are views over `data`, no per-value objects
+        are created."""
+        def _take(size: int) -> memoryview:
+            nonlocal offset
+            if offset + size > len(view):
+                raise ValueError("Truncated binary payload")
+            res = view[offset:offset + size]
+            offset += size
+            return res
+
+        view, offset = memoryview(data), 0
+        res = ColumnarPayload(measurement, np.frombuffer(_take(count * 8), dtype='<i8'))
+        for column in columns:
+            key, dtype = column['name'], column['dtype']
+            buffer = _take(int(column['size']))
+            if dtype == 'json':
+                values = np.array(json.loads(bytes(buffer).decode('utf-8')), dtype=object)
+            else:
+                dtype = np.dtype(dtype)
+                if dtype.kind not in 'biuf':
+                    raise ValueError(f"Unsupported column type '{dtype}'")
+                values = np.frombuffer(buffer, dtype=dtype)
+            if len(values) != count:
+                raise ValueError(f"Invalid length for column '{key}' ({len(values)}, expected {count})")
+            res.Columns[key] = values
+            if column.get('masked', False):
+                res.Masks[key] = np.frombuffer(_take(count), dtype=np.bool_)
+        res.Tags = tags
+        return res
+
 
 class InfluxDb:
-    _lock = RLock()
-    thread_callbacks = ThreadLocalBatchingCallback()
-    _thread_local = local()
+    _lock = Lock()
+    _client: Union[InfluxDBClient_v1, InfluxDBClient_v2, None] = None
+    _versions: Dict[str, Versions] = {}
+    _writer: InfluxWriter = None
+    _spool: Optional[InfluxSpool] = None
+    _http: HTTPConnectionPool = None
+    _writeTimeout: Optional[float] = None
+    _gzip = False
 
-    @staticmethod
-    def detectInfluxDBVersion(url):
+    @classmethod
+    def detectInfluxDBVersion(cls, url, refresh: bool = False):
+        """Retrieves the version of the server by using the /ping endpoint. The result is cached per url, so the
+        server is only contacted once per process (or when `refresh` is True)."""
+        if not refresh and url in cls._versions:
+            return cls._versions[url]
         try:
             response = requests.get(f"{url}/ping")
             header = response.headers.get('X-Influxdb-Version', 'Unknown version')
             if header.startswith(Versions.V2.value):
-                return Versions.V2
+                version = Versions.V2
             elif header.startswith(Versions.V1.value):
-                return Versions.V1
+                version = Versions.V1
             else:
                 raise Exception("Unknown influxDB version")
         except requests.exceptions.RequestException as e:
             raise RequestException("Can't connect to InfluxDB server")
+        cls._versions[url] = version
+        return version
 
     @classmethod
-    def initialize(cls):
+    def initialize(cls, replace: bool = True):
+        """Creates the client shared by all threads, replacing the previous one unless `replace` is False. The
+        client keeps a pool of connections (of `PoolSize`) so it can be used concurrently."""
         config = Config()
         influx = config.InfluxDb
         influxdb_url = f"http://{influx.Host}:{influx.Port}"
-        cls.version = cls.detectInfluxDBVersion(influxdb_url)
 
-        if hasattr(cls._thread_local, 'client'):
-            cls.cleanup()
+        with cls._lock:
+            previous = cls._client
+            if previous is not None and not replace:
+                return
+            cls.version = cls.detectInfluxDBVersion(influxdb_url)
+
+            try:
+                if cls.version == Versions.V1:
+                    cls._client = InfluxDBClient_v1(influx.Host, influx.Port, influx.User, influx.Password,
+                                                    influx.Database, pool_size=influx.PoolSize, gzip=influx.Gzip)
+                elif cls.version == Versions.V2:
+                    cls._client = InfluxDBClient_v2(url=influxdb_url, token=influx.Token, org=influx.Org,
+                                                    connection_pool_maxsize=influx.PoolSize, enable_gzip=influx.Gzip)
+            except Exception as e:
+                raise Exception(f"Exception while creating Influx client, please review configuration: {e}") from e
 
-        try:
-            if cls.version == Versions.V1:
-                cls._thread_local.client = InfluxDBClient_v1(influx.Host, influx.Port,
-                                                             influx.User, influx.Password, influx.Database)
-            elif cls.version == Versions.V2:
-                cls._thread_local.client = InfluxDBClient_v2(url=influxdb_url,
-                                                             token=influx.Token,
-                                                             org=influx.Org)
-        except Exception as e:
-            raise Exception(f"Exception while creating Influx client, please review configuration: {e}") from e
-
-        metadata = config.Metadata
-        cls.baseTags = {
-            "appname": "ELCM",
-            "facility": metadata.Facility,
-            "host": metadata.HostIp,
-            "hostname": metadata.HostName
-        }
-        cls.database = influx.Database
+            cls.baseTags = {}
+            cls.database = influx.Database
+
+        if previous is not None:
+            cls.closeClient(previous)
+
+    @classmethod
+    def Client(cls) -> Union[InfluxDBClient_v1, InfluxDBClient_v2]:
+        client = cls._client
+        if client is None:
+            cls.initialize(replace=False)
+            client = cls._client
+        return client
 
     @classmethod
     def cleanup(cls):
-        if hasattr(cls._thread_local, 'client'):
-            try:
-                cls._thread_local.client.close()
-                Log.I(f"InfluxDB client closed successfully for the thread.")
-            except Exception as e:
-                Log.I(f"Error closing InfluxDB client: {e}.")
-            finally:
-                del cls._thread_local.client
+        with cls._lock:
+            client, cls._client = cls._client, None
+        if client is not None:
+            cls.closeClient(client)
+
+    @staticmethod
+    def closeClient(client: Union[InfluxDBClient_v1, InfluxDBClient_v2]):
+        try:
+            client.close()
+            Log.I(f"InfluxDB client closed successfully.")
+        except Exception as e:
+            Log.I(f"Error closing InfluxDB client: {e}.")
 
     @classmethod
     def BaseTags(cls) -> Dict[str, object]:
@@ -175,30 +469,166 @@ class InfluxDb:
         return cls.baseTags
 
     @classmethod
-    def Send(cls, payload: InfluxPayload):
+    def Writer(cls) -> InfluxWriter:
         with cls._lock:
-            if not hasattr(cls._thread_local, 'client'):
-                cls.initialize()
-
-            payload.Tags.update(cls.BaseTags())
-            payload.Version = cls.version
-
-            callback = cls.thread_callbacks.get_callback()
-
-            if cls.version == Versions.V1:
-                cls._thread_local.client.write_points(payload.Serialized)
-            elif cls.version == Versions.V2:
-                write_api = cls._thread_local.client.write_api(error_callback=callback.error)
-                write_api.write(bucket=cls.database, org=Config().InfluxDb.Org, record=payload.Serialized)
-                write_api.close()
-            if callback.last_error:
-                tmp = callback.last_error
-                callback.last_error = None
-                cls.cleanup()
-                raise InfluxDBError(tmp.response) 
+            if cls._writer is None:
+                influx = Config().InfluxDb
+                if influx.Spool:
+                    cls._spool = InfluxSpool(influx.SpoolFolder, cls._post, cls.isTransient,
+                                             int(influx.SpoolSegmentSize * 2**20), influx.BatchSize,
+                                             influx.RetryInterval)
+                cls._writer = InfluxWriter(cls._writeBatch, influx.QueueSize, influx.BatchSize, influx.FlushInterval)
+            return cls._writer
+
+    @classmethod
+    def Status(cls) -> Dict[str, object]:
+        writer, spool = cls._writer, cls._spool
+        return {
+            'QueueDepth': 0 if writer is None else writer.Depth,
+            'Spool': None if spool is None else spool.Status
+        }
 
     @classmethod
-    def PayloadToCsv(cls, payload: InfluxPayload, outputFile: str):
+    def Send(cls, payload: InfluxPayload, block: bool = True):
+        """Enqueues the payload on the shared background writer. Errors from previous writes of the same
+        execution are raised here, use Flush to wait for (and check) the payloads already sent. If the spool
+        is enabled, payloads that do not fit in the queue are stored in the spool instead of blocking.
+        Otherwise, waits until there is space in the queue, unless `block` is False (in that case the
+        payload is discarded and an exception raised)."""
+        writer = cls.Writer()
+        error = cls.popError(writer.ExecutionOf(payload))
+        if error is not None:
+            raise error
+
+        payload.Tags.update(cls.BaseTags())
+        if cls._spool is None:
+            writer.Put(payload, block=block)
+        elif not writer.TryPut(payload):
+            # Never wait for the database when the spool is enabled
+            cls._spool.Append(writer.ExecutionOf(payload), payload.LineProtocol)
+
+    @classmethod
+    def Flush(cls, executionId: Optional[int] = None, timeout: Optional[float] = None):
+        """Waits until all the payloads of the execution have been written, raising the last error, if any.
+        Payloads stored in the spool are also waited for, unless the server is currently failing (they will
+        be written once it is available again, a warning is logged in that case)."""
+        writer = cls.Writer()
+        start = monotonic()
+        if not writer.Flush(executionId, timeout):
+            raise TimeoutError(f"Timeout while waiting for pending InfluxDb writes ({executionId})")
+
+        spool = cls._spool
+        if spool is not None and executionId is not None:
+            key = str(executionId)
+            remaining = None if timeout is None else max(0.0, timeout - (monotonic() - start))
+            if not spool.Wait(key, remaining):
+                Log.W(f"Values of execution {key} remain in the InfluxDb spool, they will be written "
+                      f"once the database is available")
+
+        error = cls.popError(executionId)
+        if error is not None:
+            raise error
+
+    @classmethod
+    def popError(cls, executionId: Optional[str]) -> Optional[Exception]:
+        """Errors reported by the writer or, for values rejected while replaying the spool, by the spool"""
+        error = cls.Writer().PopError(executionId)
+        if error is None and cls._spool is not None:
+            error = cls._spool.PopError(executionId)
+        return error
+
+    @classmethod
+    def _initializeHttp(cls):
+        """Prepares the raw line protocol endpoint (/write for V1, /api/v2/write for V2) used by the writer"""
+        influx = Config().InfluxDb
+        cls.version = cls.detectInfluxDBVersion(f"http://{influx.Host}:{influx.Port}")
+
+        headers = {'Content-Type': 'text/plain; charset=utf-8'}
+        if cls.version == Versions.V1:
+            cls._writePath = f'/write?db={quote(str(influx.Database))}&precision=ns'
+            if influx.User is not None:
+                headers.update(make_headers(basic_auth=f'{influx.User}:{influx.Password}'))
+        else:
+            cls._writePath = f'/api/v2/write?org={quote(str(influx.Org))}&bucket={quote(str(influx.Database))}&precision=ns'
+            headers['Authorization'] = f'Token {influx.Token}'
+        if influx.Gzip:
+            headers['Content-Encoding'] = 'gzip'
+        cls._writeHeaders = headers
+        cls._writeTimeout = influx.WriteTimeout
+        cls._gzip = influx.Gzip
+        cls._http = HTTPConnectionPool(influx.Host, int(influx.Port), maxsize=2)  # Writer and spool threads
+
+    @classmethod
+    def _post(cls, body: bytes):
+        if cls._http is None:
+            with cls._lock:
+                if cls._http is None:
+                    cls._initializeHttp()
+
+        if cls._gzip:
+            body = gzip.compress(body, compresslevel=6)
+        response = cls._http.request('POST', cls._writePath, body=body, headers=cls._writeHeaders,
+                                     retries=False, timeout=cls._writeTimeout)
+        if response.status not in (200, 204):
+            raise InfluxDBError(response)
+
+    @staticmethod
+    def isTransient(error: Exception) -> bool:
+        """True for errors that may disappear if the write is retried later (the server is unreachable, slow
+        or overloaded), False if the server rejected the values"""
+        if isinstance(error, InfluxDBError):
+            return error.response is not None and (error.response.status >= 500 or error.response.status == 429)
+        return isinstance(error, (HTTPError, RequestException, OSError))
+
+    @classmethod
+    def _writeBatch(cls, payloads: List[InfluxPayload]) -> Dict[str, Exception]:
+        """Writes the batch with a single request. If the server rejects it, the values of each execution are
+        written separately, so that the error is reported only to the executions with rejected values.
+        Returns the errors per execution; transient errors are raised (or the values spooled, if enabled)."""
+        spool = cls._spool
+        bodies: Dict[str, List[bytes]] = {}
+        for payload in payloads:
+            bodies.setdefault(InfluxWriter.ExecutionOf(payload), []).append(payload.LineProtocol)
+        bodies = {key: b'\n'.join(filter(None, values)) for key, values in bodies.items()}
+        bodies = {key: body for key, body in bodies.items() if len(body) != 0}
+        if len(bodies) == 0: return {}
+
+        # While the spool has data the server has recently failed, avoid waiting for a new timeout
+        if spool is not None and spool.HasData:
+            for key, body in bodies.items():
+                spool.Append(key, body)
+            return {}
+
+        try:
+            cls._post(b'\n'.join(bodies.values()))
+            return {}
+        except Exception as e:
+            if cls.isTransient(e):
+                if spool is None:
+                    raise
+                Log.W(f"Unable to write to InfluxDb ({e}), values will be stored in the spool")
+                for key, body in bodies.items():
+                    spool.Append(key, body)
+                return {}
+            if len(bodies) == 1:
+                return {key: e for key in bodies.keys()}
+
+        errors = {}
+        for key, body in bodies.items():
+            try:
+                cls._post(body)
+            except Exception as e:
+                if spool is not None and cls.isTransient(e):
+                    spool.Append(key, body)
+                else:
+                    errors[key] = e
+        return errors
+
+    @classmethod
+    def PayloadToCsv(cls, payload: Union[InfluxPayload, ColumnarPayload], outputFile: str):
+        if isinstance(payload, ColumnarPayload):
+            return cls.columnarToCsv(payload, outputFile)
+
         allKeys = {'Datetime', 'Timestamp'}
         for point in payload.Points:
             allKeys.update(point.Fields.keys())
@@ -216,91 +646,160 @@ class InfluxDb:
                 csv.writerow(data)
 
     @classmethod
-    def CsvToPayload(cls, measurement: str, csvFile: str, delimiter: str, timestampKey: str,
-                    tryConvert: bool = True, keysToRemove: List[str] = None) -> InfluxPayload:
-        
-        from Executor.Tasks.Run.to_influx import ToInfluxBase
+    def columnarToCsv(cls, payload: ColumnarPayload, outputFile: str):
+        """Same output as PayloadToCsv, but built column by column instead of creating a dict per point"""
+        fields = sorted(set(payload.Columns.keys()) | {'Datetime', 'Timestamp'})
+        tags = sorted(payload.Tags.keys())
+
+        columns = []
+        for key in fields:
+            if key == 'Datetime':
+                columns.append(payload.Datetimes)
+            elif key == 'Timestamp':
+                columns.append((payload.Timestamps // 1000 / 1e6).tolist())
+            else:
+                values = payload.Columns[key].tolist()
+                for index in np.flatnonzero(payload.Missing(key)).tolist():
+                    values[index] = ''
+                columns.append(values)
+        tagValues = [payload.Tags[key] for key in tags]
 
-        def _convert(value: str) -> Union[int, float, bool, str]:
-            try:
-                return float(value)
-            except ValueError:
-                pass
-            return {'true': True, 'false': False}.get(value.lower(), value)
+        with open(os.path.abspath(outputFile), 'w', encoding='utf-8', newline='') as output:
+            csv = writer(output)
+            csv.writerow(fields + tags)
+            for row in zip(*columns):
+                csv.writerow([*row, *tagValues])
 
-        def parse_timestamp(timestamp_str: str) -> datetime:
-            try:
-                ts = float(timestamp_str)
-            except ValueError:
-                raise RuntimeError(f"Invalid timestamp: {timestamp_str}")
+    @classmethod
+    def CsvToPayload(cls, measurement: str, csvFile: str, delimiter: str, timestampKey: str,
+                     tryConvert: bool = True, keysToRemove: List[str] = None) -> ColumnarPayload:
+        return next(cls.CsvToPayloads(measurement, csvFile, delimiter, timestampKey, tryConvert, keysToRemove,
+                                      chunkSize=None), ColumnarPayload(measurement))
 
-            if ts > 1e17:
-                return datetime.fromtimestamp(ts / 1e9, tz=timezone.utc)
-            elif ts > 1e12:
-                return datetime.fromtimestamp(ts / 1e3, tz=timezone.utc)
-            else:
-                return datetime.fromtimestamp(ts, tz=timezone.utc)
+    @classmethod
+    def CsvToPayloads(cls, measurement: str, csvFile: str, delimiter: str, timestampKey: str,
+                      tryConvert: bool = True, keysToRemove: List[str] = None,
+                      chunkSize: Optional[int] = 10000) -> Iterator[ColumnarPayload]:
+        """Reads the CSV file incrementally, yielding a payload every `chunkSize` rows (or a single payload with
+        all the rows if None), so that the whole file is never kept in memory. Types are inferred once per
+        column and chunk, and converted with vectorized operations."""
 
-        keysToRemove = keysToRemove or []
+        from Executor.Tasks.Run.to_influx import ToInfluxBase
 
-        if not hasattr(cls._thread_local, 'client'):
-            cls.initialize()
+        keysToRemove = keysToRemove or []
 
         with open(csvFile, 'r', encoding='utf-8', newline='') as file:
             header = file.readline()
-            keys = [k.strip() for k in header.split(delimiter)]
-
-            if timestampKey not in keys:
-                raise RuntimeError(f"CSV file does not seem to contain timestamp ('{timestampKey}'). "
-                                f"Found keys: {keys}")
-
-            dialect = baseDialect()
-            dialect.delimiter = str(delimiter.strip())
-            csv = DictReader(file, fieldnames=keys, restval=None, dialect=dialect)
-
-            payload = InfluxPayload(measurement)
-
-            for row in csv:
-                ts_str = row.pop(timestampKey)
-                try:
-                    timestamp = parse_timestamp(ts_str)
-                except Exception:
-                    try:
-                        timestamp = isoparse(ts_str)
-                    except Exception as e:
-                        raise RuntimeError(f"Error parsing timestamp: {ts_str}") from e
-
-                point = InfluxPoint(timestamp)
+        keys = [k.strip() for k in header.split(delimiter)]
+
+        if timestampKey not in keys:
+            raise RuntimeError(f"CSV file does not seem to contain timestamp ('{timestampKey}'). "
+                               f"Found keys: {keys}")
+
+        chunks = pd.read_csv(csvFile, sep=str(delimiter.strip()), header=None, skiprows=1, names=keys,
+                             index_col=False, dtype=str, keep_default_na=False, quoting=QUOTE_NONE,
+                             encoding='utf-8', chunksize=chunkSize)
+        if chunkSize is None:
+            chunks = [chunks]
+
+        for chunk in chunks:
+            if len(chunk) == 0: continue
+            payload = ColumnarPayload(measurement, cls.csvTimestamps(chunk[timestampKey]))
+
+            if "_field" in chunk.columns:
+                names = chunk["_field"]
+                values = chunk["_value"] if "_value" in chunk.columns else pd.Series(pd.NA, index=chunk.index)
+                for name in names.dropna().unique():
+                    # Rows of other fields are missing values, so the type is inferred only from this field
+                    column, mask = cls.csvColumn(values.where(names == name), tryConvert)
+                    field = ToInfluxBase.sanitize_string(name)
+                    payload.Columns[field] = column
+                    if mask is not None:
+                        payload.Masks[field] = mask
+
+            for key in chunk.columns:
+                if key in keysToRemove or key in [timestampKey, "_field", "_value"]:
+                    continue
+                column, mask = cls.csvColumn(chunk[key], tryConvert)
+                cleanKey = ToInfluxBase.sanitize_string(key)
+                payload.Columns[cleanKey] = column
+                payload.Masks.pop(cleanKey, None)
+                if mask is not None:
+                    payload.Masks[cleanKey] = mask
+
+            yield payload
 
-                field_name = row.pop("_field", None)
-                raw_value = row.pop("_value", None)
+    @staticmethod
+    def csvTimestamps(column: pd.Series) -> np.ndarray:
+        """Converts a CSV timestamp column to int64 nanoseconds. Numeric values are read as seconds, milliseconds
+        or nanoseconds depending on their magnitude, other values are parsed as ISO 8601. As in the previous
+        datetime based conversion, the result has microsecond resolution."""
+        def _invalid(index):
+            return RuntimeError(f"Error parsing timestamp: {column.iloc[index]}")
+
+        values = column.to_numpy(dtype=object)
+        numeric = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64)
+        isNumeric = ~np.isnan(numeric)
+
+        res = np.zeros(len(values), dtype=np.int64)
+        if isNumeric.any():
+            seconds = numeric[isNumeric]
+            seconds = np.where(seconds > 1e17, seconds / 1e9, np.where(seconds > 1e12, seconds / 1e3, seconds))
+            if not np.isfinite(seconds).all():
+                raise _invalid(int(np.flatnonzero(isNumeric)[np.flatnonzero(~np.isfinite(seconds))[0]]))
+            res[isNumeric] = np.round(seconds * 1e6).astype(np.int64) * 1000
+
+        if not isNumeric.all():
+            others = pd.Series(values[~isNumeric])
+            parsed = pd.to_datetime(others, format='ISO8601', utc=True, errors='coerce')
+            if parsed.isna().any():
+                raise _invalid(int(np.flatnonzero(~isNumeric)[np.flatnonzero(parsed.isna().to_numpy())[0]]))
+            nanoseconds = parsed.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+            res[~isNumeric] = (nanoseconds // 1000) * 1000
+        return res
 
-                if field_name is not None:
-                    clean_field = ToInfluxBase.sanitize_string(field_name)
-                    value = _convert(raw_value) if tryConvert else raw_value
-                    point.Fields[clean_field] = value
+    @staticmethod
+    def csvColumn(column: pd.Series, tryConvert: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Converts a column of CSV strings, inferring the type once for all the values: float if all of them are
+        numeric, bool if all of them are 'true' or 'false' (any case), and per-value conversion otherwise."""
+        missing = column.isna().to_numpy()
+        mask = missing if missing.any() else None
+        values = column.to_numpy(dtype=object)
+        if mask is not None:
+            values = np.where(missing, '', values)
+
+        if not tryConvert:
+            return values, mask
+
+        text = values.astype(str)
+        try:
+            return text.astype(np.float64), mask
+        except ValueError:
+            pass
 
-                for key, value in row.items():
-                    if key in keysToRemove:
-                        continue
-                    clean_key = ToInfluxBase.sanitize_string(key)
-                    point.Fields[clean_key] = _convert(value) if tryConvert else value
+        lower = np.char.lower(text)
+        isTrue = lower == 'true'
+        if (isTrue | (lower == 'false') | (missing if mask is not None else False)).all():
+            return isTrue, mask
 
-                payload.Points.append(point)
+        def _convert(value: str) -> Union[float, bool, str]:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+            return {'true': True, 'false': False}.get(value.lower(), value)
 
-        return payload
+        return np.array([_convert(value) for value in text.tolist()], dtype=object), mask
 
     @classmethod
     def GetExecutionMeasurements(cls, executionId: int) -> List[str]:
-        if not hasattr(cls._thread_local, 'client'):
-            cls.initialize()
-
+        client = cls.Client()
         if cls.version == Versions.V1:
-            reply = cls._thread_local.client.query(f'SHOW measurements WHERE ExecutionId =~ /^{executionId}$/')
+            reply = client.query(f'SHOW measurements WHERE ExecutionId =~ /^{executionId}$/')
             return [e['name'] for e in reply['measurements']]
 
         elif cls.version == Versions.V2:
-            reply = cls._thread_local.client.query_api().query(f'''
+            reply = client.query_api().query(f'''
             from(bucket: "{cls.database}")
             |> range(start: 0)
             |> filter(fn: (r) => r["ExecutionId"] == "{executionId}")
@@ -311,38 +810,94 @@ class InfluxDb:
             return [record.get_value() for table in reply for record in table.records]
 
     @classmethod
-    def GetMeasurement(cls, executionId: int, measurement: str) -> List[InfluxPayload]:
-        def _getTagSet(point, tags):
-            values = [str(point[tag]) for tag in tags]
-            return ','.join(values)
+    def GetMeasurement(cls, executionId: int, measurement: str, since: Optional[int] = None) -> List[InfluxPayload]:
+        return list(cls.GetMeasurementStream(executionId, measurement, since=since))
 
+    @classmethod
+    def GetMeasurements(cls, executionId: int, measurements: List[str], since: Optional[Dict[str, int]] = None,
+                        workers: Optional[int] = None) -> Iterator[Tuple[str, List[InfluxPayload]]]:
+        """Retrieves several measurements concurrently, using up to `workers` threads (`QueryWorkers` by default)
+        that share the pooled client. Yields (measurement, payloads) in the same order as `measurements`; at most
+        `workers` measurements are retrieved in advance of the one being consumed. Each measurement is kept
+        complete in memory, use GetMeasurementStream when the memory must stay bounded."""
+        workers = max(1, workers or Config().InfluxDb.QueryWorkers)
+        since = since or {}
+
+        def _retrieve(measurement: str) -> Tuple[List[InfluxPayload], float]:
+            start = perf_counter()
+            payloads = cls.GetMeasurement(executionId, measurement, since.get(measurement))
+            return payloads, perf_counter() - start
+
+        start, busy = perf_counter(), 0.0
+        remaining = iter(measurements)
+        pending = deque()
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='InfluxQuery')
+        try:
+            for measurement in islice(remaining, workers):
+                pending.append((measurement, pool.submit(_retrieve, measurement)))
+
+            while len(pending) != 0:
+                measurement, future = pending.popleft()
+                payloads, elapsed = future.result()
+                busy += elapsed
+                for following in islice(remaining, 1):
+                    pending.append((following, pool.submit(_retrieve, following)))
+                Log.D(f"Retrieved measurement '{measurement}' of execution {executionId} in {elapsed:.3f}s "
+                      f"({sum(p.PointCount for p in payloads)} points)")
+                yield measurement, payloads
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = perf_counter() - start
+        Log.D(f"Retrieved {len(measurements)} measurements of execution {executionId} in {elapsed:.3f}s using "
+              f"{workers} workers ({busy:.3f}s of queries, {busy / elapsed if elapsed > 0 else 1:.1f}x speedup)")
+
+    @classmethod
+    def GetMeasurementStream(cls, executionId: int, measurement: str, chunkSize: int = 10000,
+                             since: Optional[int] = None) -> Iterator[InfluxPayload]:
+        """Retrieves the values of a measurement using chunked queries, yielding one payload per tag set as soon
+        as all its points have been received, so that the complete measurement is never kept in memory.
+        If `since` (nanoseconds since the epoch) is set, only the points newer than that instant are retrieved."""
         def _getDateTime(value):
             try:
                 return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ")
             except ValueError:
                 return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
 
-        if not hasattr(cls._thread_local, 'client'):
-            cls.initialize()
-
-        pointsPerTagSet = {}
-        tags = []
+        client = cls.Client()
         if cls.version == Versions.V1:
             # Retrieve the list of tags from the server, to separate from fields
-            reply = cls._thread_local.client.query(f'show tag keys on "{cls.database}" from "{measurement}"')
+            reply = client.query(f'show tag keys on "{cls.database}" from "{measurement}"')
             tags = sorted([t['tagKey'] for t in reply.get_points()])
 
-            # Retrieve all points, separated depending on the tags
-            reply = cls._thread_local.client.query(f'SELECT * FROM "{measurement}" WHERE ExecutionId =~ /^{executionId}$/')
-            for point in reply.get_points():
-                tagSet = _getTagSet(point, tags)
-                if tagSet not in pointsPerTagSet.keys():
-                    pointsPerTagSet[tagSet] = []
-                pointsPerTagSet[tagSet].append(point)
+            # Series are returned one after the other (grouped by tag set), possibly split between chunks
+            payload, tagSet = None, None
+            condition = f'ExecutionId =~ /^{executionId}$/' + (f' AND time > {int(since)}' if since is not None else '')
+            chunks = client.query(f'SELECT * FROM "{measurement}" WHERE {condition} GROUP BY *',
+                                  chunked=True, chunk_size=chunkSize)
+            for chunk in chunks:
+                for series in chunk.raw.get('series', []):
+                    seriesTags = series.get('tags', None) or {}
+                    values = tuple(seriesTags.get(tag) or None for tag in tags)
+                    if values != tagSet:
+                        if payload is not None:
+                            yield payload
+                        payload, tagSet = InfluxPayload(f'Remote_{measurement}'), values
+                        payload.Tags = dict(zip(tags, values))
+
+                    columns = series['columns']
+                    timeIndex = columns.index('time')
+                    for row in series.get('values', []):
+                        influxPoint = InfluxPoint(_getDateTime(row[timeIndex]))
+                        influxPoint.Fields = {key: value for key, value in zip(columns, row) if key != 'time'}
+                        payload.Points.append(influxPoint)
+
+            if payload is not None:
+                yield payload
 
         elif cls.version == Versions.V2:
             # Retrieve the list of tags from the server, to separate from fields
-            reply = cls._thread_local.client.query_api().query(f'''
+            reply = client.query_api().query(f'''
             import "influxdata/influxdb/schema"
             schema.tagKeys(
             bucket: "{cls.database}",
@@ -350,45 +905,36 @@ class InfluxDb:
             start: 0)
             ''', org=Config().InfluxDb.Org)
             tags = sorted([record.get_value() for table in reply for record in table.records])
+            groupColumns = ', '.join(f'"{tag}"' for tag in tags)
 
-            # Retrieve all points, separated depending on the tags
-            reply = cls._thread_local.client.query_api().query(f'''
+            # Regroup the values so that each table contains all the points of a tag set
+            start = f'time(v: {int(since) + 1})' if since is not None else '0'
+            records = client.query_api().query_stream(f'''
             from(bucket: "{cls.database}")
-            |> range(start: 0)
-            |> filter(fn: (r) => r._measurement == "{measurement}")
+            |> range(start: {start})
+            |> filter(fn: (r) => r._measurement == "{measurement}" and r["ExecutionId"] == "{executionId}")
+            |> group(columns: [{groupColumns}])
             ''', org=Config().InfluxDb.Org)
-            for table in reply:
-                for point in table.records:
-                    tagSet = _getTagSet(point, tags)
-                    if tagSet not in pointsPerTagSet.keys():
-                        pointsPerTagSet[tagSet] = []
-                    pointsPerTagSet[tagSet].append(point)
-
-        res = []
-
-        # Process each set of points as a separate InfluxPayload
-        for points in pointsPerTagSet.values():
-            payload = InfluxPayload(f'Remote_{measurement}')
-            for tag in tags:
-                payload.Tags[tag] = points[0][tag]
-
-            for point in points:
-                if cls.version == Versions.V2:
-                    point = {"measurement": point.get_measurement(), "field": point.get_field(),
-                             "value": point.get_value(), "time": point.get_time(), **point.values}
-                    timestamp = point.pop('time')
-                    influxPoint = InfluxPoint(timestamp)
-                elif cls.version == Versions.V1:
-                    timestamp = point.pop('time')
-                    influxPoint = InfluxPoint(_getDateTime(timestamp))
+
+            payload, table = None, None
+            for record in records:
+                if record.table != table:
+                    if payload is not None:
+                        yield payload
+                    payload, table = InfluxPayload(f'Remote_{measurement}'), record.table
+                    for tag in tags:
+                        payload.Tags[tag] = record.values.get(tag)
+
+                point = {"measurement": record.get_measurement(), "field": record.get_field(),
+                         "value": record.get_value(), "time": record.get_time(), **record.values}
+                influxPoint = InfluxPoint(point.pop('time'))
                 for key in [f for f in point.keys() if f not in tags]:
                     influxPoint.Fields[key] = point[key]
                 payload.Points.append(influxPoint)
 
-            res.append(payload)
+            if payload is not None:
+                yield payload
 
-        return res
-    
     def export_influxdb_v1(influx_dir, database, id_csv, url, user, password, custom_query):
         output_file = os.path.join(influx_dir, f"csv_query_{id_csv}.csv")
 
@@ -0,0 +1,188 @@
+from os.path import join, isdir, getsize
+from os import listdir, remove, rmdir
+from threading import Thread, Condition
+from time import sleep
+from typing import Callable, Dict, List, Optional
+from .io import IO
+from .log import Log
+
+
+class InfluxSpool:
+    """Local write-ahead spool for InfluxDb. Line protocol that cannot be written (timeouts, connection errors or
+    server errors) is appended to segment files, one folder per execution:
+
+        <folder>/<ExecutionId>/<segment number>.lp
+
+    A background thread replays the closed segments (in order, in batches) once the server accepts writes again,
+    deleting each segment after it has been written. Segments left from a previous run are replayed on start.
+    A segment that fails halfway is sent again from the beginning, rewriting a point with the same series and
+    timestamp has no effect in InfluxDb. Batches rejected by the server (errors that are not transient) are not
+    retried, they are moved to <folder>/Rejected/<ExecutionId>/ and the error is kept for the execution."""
+
+    extension = '.lp'
+    rejectedFolder = 'Rejected'
+
+    def __init__(self, folder: str, writeMethod: Callable[[bytes], None], isTransient: Callable[[Exception], bool],
+                 segmentSize: int, batchSize: int, retryInterval: float):
+        self.folder = folder
+        self.writeMethod = writeMethod
+        self.isTransient = isTransient
+        self.segmentSize = segmentSize
+        self.batchSize = batchSize
+        self.retryInterval = retryInterval
+        self.condition = Condition()
+        self.segments: Dict[str, List[int]] = {}  # Dict[<ExecutionId>: <segment numbers, oldest first>]
+        self.bytes: Dict[str, int] = {}
+        self.open: Dict[str, int] = {}  # Segment currently receiving appends, per execution
+        self.replayed = 0
+        self.rejected = 0
+        self.lastError: Optional[str] = None
+        self.errors: Dict[str, Exception] = {}
+
+        IO.EnsureFolder(folder)
+        self._load()
+        self.thread = Thread(target=self._run, name="InfluxSpool", daemon=True)
+        self.thread.start()
+
+    @property
+    def HasData(self) -> bool:
+        with self.condition:
+            return len(self.segments) != 0
+
+    @property
+    def Depth(self) -> int:
+        """Total size, in bytes, of the line protocol waiting in the spool"""
+        with self.condition:
+            return sum(self.bytes.values())
+
+    @property
+    def Status(self) -> Dict[str, object]:
+        with self.condition:
+            return {
+                'Bytes': sum(self.bytes.values()),
+                'Segments': sum(len(s) for s in self.segments.values()),
+                'Executions': {key: {'Segments': len(segments), 'Bytes': self.bytes.get(key, 0)}
+                               for key, segments in self.segments.items()},
+                'ReplayedSegments': self.replayed,
+                'RejectedBatches': self.rejected,
+                'LastError': self.lastError
+            }
+
+    def PopError(self, executionId: Optional[str]) -> Optional[Exception]:
+        with self.condition:
+            if executionId is None:
+                if len(self.errors) == 0: return None
+                return self.errors.pop(next(iter(self.errors)))
+            return self.errors.pop(str(executionId) or 'None', None)
+
+    def Wait(self, executionId: str, timeout: Optional[float] = None) -> bool:
+        """Waits until the values of the execution have been replayed, or until a replay attempt fails (the
+        values would stay in the spool until the server is available). Returns True if no values remain."""
+        key = executionId or 'None'
+        with self.condition:
+            self.condition.wait_for(lambda: key not in self.segments or self.lastError is not None, timeout)
+            return key not in self.segments
+
+    def Append(self, executionId: str, body: bytes):
+        if len(body) == 0: return
+        key = executionId or 'None'
+
+        with self.condition:
+            number = self.open.get(key)
+            if number is None or getsize(self._path(key, number)) >= self.segmentSize:
+                number = (self.segments[key][-1] + 1) if key in self.segments else 0
+                self.segments.setdefault(key, []).append(number)
+                self.open[key] = number
+                IO.EnsureFolder(join(self.folder, key))
+
+            if not body.endswith(b'\n'):
+                body += b'\n'
+            with open(self._path(key, number), 'ab') as output:
+                output.write(body)
+            self.bytes[key] = self.bytes.get(key, 0) + len(body)
+            self.condition.notify_all()
+
+    def _path(self, key: str, number: int) -> str:
+        return join(self.folder, key, f'{number:08d}{self.extension}')
+
+    def _load(self):
+        for key in listdir(self.folder):
+            path = join(self.folder, key)
+            if key == self.rejectedFolder or not isdir(path): continue
+            numbers = sorted(int(f[:-len(self.extension)]) for f in listdir(path) if f.endswith(self.extension))
+            if len(numbers) != 0:
+                self.segments[key] = numbers
+                self.bytes[key] = sum(getsize(self._path(key, n)) for n in numbers)
+        if len(self.segments) != 0:
+            Log.W(f"InfluxDb spool contains {sum(self.bytes.values())} bytes from a previous run, "
+                  f"they will be sent to the database")
+
+    def _next(self) -> (str, int):
+        """Waits until there is a segment to replay, closing it for appends"""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.segments) != 0)
+            key = next(iter(self.segments))
+            number = self.segments[key][0]
+            if self.open.get(key) == number:
+                self.open.pop(key)
+            return key, number
+
+    def _replay(self, key: str, number: int):
+        path = self._path(key, number)
+        size = getsize(path)
+        with open(path, 'rb') as file:
+            lines = file.read().splitlines()
+
+        rejected: List[bytes] = []
+        error = None
+        for start in range(0, len(lines), self.batchSize):
+            batch = b'\n'.join(lines[start:start + self.batchSize])
+            try:
+                self.writeMethod(batch)
+            except Exception as e:
+                if self.isTransient(e):
+                    raise
+                rejected.append(batch)
+                error = e
+
+        if error is not None:
+            self._reject(key, number, rejected, error)
+
+        with self.condition:
+            remove(path)
+            self.segments[key].pop(0)
+            self.bytes[key] = max(0, self.bytes.get(key, 0) - size)
+            if len(self.segments[key]) == 0:
+                self.segments.pop(key)
+                self.bytes.pop(key, None)
+                try:
+                    rmdir(join(self.folder, key))
+                except OSError:
+                    pass
+            self.replayed += 1
+            self.lastError = None
+            self.condition.notify_all()
+
+    def _reject(self, key: str, number: int, batches: List[bytes], error: Exception):
+        """Keeps the batches rejected by the server out of the spool, so that they do not block the rest"""
+        folder = join(self.folder, self.rejectedFolder, key)
+        IO.EnsureFolder(folder)
+        with open(join(folder, f'{number:08d}{self.extension}'), 'ab') as output:
+            output.write(b'\n'.join(batches) + b'\n')
+        Log.E(f"InfluxDb rejected {len(batches)} spooled batches of execution {key} ({error}), "
+              f"moved to {folder}")
+        with self.condition:
+            self.rejected += len(batches)
+            self.errors[key] = error
+
+    def _run(self):
+        while True:
+            key, number = self._next()
+            try:
+                self._replay(key, number)
+            except Exception as e:
+                with self.condition:
+                    self.lastError = str(e)
+                    self.condition.notify_all()
+                Log.D(f"InfluxDb spool replay failed ({e}), retrying in {self.retryInterval} seconds")
+                sleep(self.retryInterval)
@@ -0,0 +1,125 @@
+from queue import Queue, Full, Empty
+from threading import Thread, Condition, Event
+from time import monotonic
+from typing import Callable, Dict, List, Optional
+from .log import Log
+
+
+class InfluxWriter:
+    """Shared background writer for InfluxDb. Producers enqueue payloads without waiting for the database,
+    a single thread groups them in batches (by number of points or elapsed time) and writes each batch
+    with one request. Errors are kept per execution and reported back on the next Send or Flush.
+    `writeMethod` returns the errors of the executions whose values were rejected (if any), an exception
+    raised by it is considered an error of every execution in the batch."""
+
+    def __init__(self, writeMethod: Callable[[List], Optional[Dict[str, Exception]]], queueSize: int,
+                 batchSize: int, flushInterval: float):
+        self.writeMethod = writeMethod
+        self.queue = Queue(maxsize=queueSize)
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval
+        self.condition = Condition()
+        self.flushRequested = Event()
+        self.pending: Dict[str, int] = {}  # Dict[<ExecutionId>: <payloads not yet written>]
+        self.errors: Dict[str, Exception] = {}
+        self.thread = Thread(target=self._run, name="InfluxWriter", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def ExecutionOf(payload) -> str:
+        return str(payload.Tags.get('ExecutionId', ''))
+
+    @property
+    def Depth(self) -> int:
+        return self.queue.qsize()
+
+    def Put(self, payload, block: bool = False, timeout: Optional[float] = None):
+        key = self.ExecutionOf(payload)
+        with self.condition:
+            self.pending[key] = self.pending.get(key, 0) + 1
+        try:
+            self.queue.put(payload, block=block, timeout=timeout)
+        except Full:
+            self._done([key])
+            raise RuntimeError(f"InfluxDb write queue is full ({self.queue.maxsize} payloads), payload discarded")
+
+    def TryPut(self, payload) -> bool:
+        """Enqueues the payload only if there is space available, returns False otherwise"""
+        try:
+            self.Put(payload)
+            return True
+        except RuntimeError:
+            return False
+
+    def PopError(self, executionId: Optional[str]) -> Optional[Exception]:
+        with self.condition:
+            if executionId is None:
+                if len(self.errors) == 0: return None
+                key = next(iter(self.errors))
+                return self.errors.pop(key)
+            return self.errors.pop(str(executionId), None)
+
+    def Flush(self, executionId: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Waits until every payload of the execution (or all of them, if None) has been written.
+        Returns False if the timeout expired before that."""
+        def _isDone():
+            if executionId is None:
+                return all(count == 0 for count in self.pending.values())
+            return self.pending.get(str(executionId), 0) == 0
+
+        with self.condition:
+            if _isDone(): return True
+            self.flushRequested.set()
+            return self.condition.wait_for(_isDone, timeout)
+
+    def _done(self, keys: List[str], errors: Optional[Dict[str, Exception]] = None):
+        with self.condition:
+            for key in keys:
+                remaining = self.pending.get(key, 1) - 1
+                if remaining <= 0:
+                    self.pending.pop(key, None)
+                else:
+                    self.pending[key] = remaining
+            self.errors.update(errors or {})
+            self.condition.notify_all()
+
+    def _collect(self) -> List:
+        batch = [self.queue.get()]
+        points = batch[0].PointCount
+        deadline = monotonic() + self.flushInterval
+        while points < self.batchSize and not self.flushRequested.is_set():
+            remaining = deadline - monotonic()
+            if remaining <= 0: break
+            try:
+                payload = self.queue.get(timeout=min(remaining, 0.1))
+            except Empty:
+                continue
+            batch.append(payload)
+            points += payload.PointCount
+
+        # Take anything that is already waiting, up to the batch size, without further delays
+        while points < self.batchSize:
+            try:
+                payload = self.queue.get_nowait()
+            except Empty:
+                break
+            batch.append(payload)
+            points += payload.PointCount
+
+        if self.queue.empty():
+            self.flushRequested.clear()
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            keys = [self.ExecutionOf(payload) for payload in batch]
+            try:
+                errors = self.writeMethod(batch) or {}
+            except Exception as e:
+                Log.E(f"Exception while writing {len(batch)} payloads to InfluxDb: {e}")
+                errors = {key: e for key in keys}
+            else:
+                for key, error in errors.items():
+                    Log.E(f"InfluxDb rejected the values of execution {key}: {error}")
+            self._done(keys, errors)
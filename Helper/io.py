@@ -1,6 +1,7 @@
-from os.path import abspath, join, isdir, isfile, exists
+from os.path import abspath, join, isdir, isfile, exists, getmtime
 from os import listdir, makedirs
 from typing import List
+from hashlib import sha256
 
 
 class IO:
@@ -31,3 +32,21 @@ class IO:
             makedirs(folder, exist_ok=True)
             return False
         return True
+
+    @staticmethod
+    def FileChecksum(path: str) -> str:
+        """SHA-256 (hex) of the file contents. The value is cached in a '<path>.sha256' file, which is reused
+        while the file is not modified"""
+        cache = f'{path}.sha256'
+        if isfile(cache) and getmtime(cache) >= getmtime(path):
+            with open(cache, 'r', encoding='utf-8') as file:
+                return file.read().strip()
+
+        hasher = sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        checksum = hasher.hexdigest()
+        with open(cache, 'w', encoding='utf-8') as file:
+            file.write(checksum)
+        return checksum
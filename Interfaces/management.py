@@ -52,6 +52,20 @@ class Management:
     def ReleaseLocalResources(cls, owner: 'ExecutorBase', localResources: List[str]):
         Facility.ReleaseResources(localResources, owner)
 
+    @classmethod
+    def WaitForResources(cls, owner: 'ExecutorBase', timeout: float) -> bool:
+        """Waits until some of the local resources requested by the owner are released, or the timeout expires.
+        The timeout also covers the cases that cannot be notified (like the availability of VIM resources)"""
+        return Facility.WaitForResources(owner, timeout)
+
+    @classmethod
+    def WakeUp(cls, owner: 'ExecutorBase'):
+        Facility.WakeUp(owner.ExecutionId)
+
+    @classmethod
+    def CancelResourcesRequest(cls, owner: 'ExecutorBase'):
+        Facility.CancelRequest(owner)
+
     @classmethod
     def SliceManager(cls):
         if cls.sliceManager is None:
@@ -1,35 +1,124 @@
 from REST import RestClient
 import json
-from threading import Thread
-from typing import Optional, Union
+from collections import OrderedDict
+from threading import Thread, Condition, Lock
+from time import sleep
+from typing import Optional, Union, Dict, Tuple, List
 from Settings.config import Portal as PortalConfig
 
 
+class portalWorker:
+    """Single background worker that sends the execution updates to the Portal, in order and at a bounded rate.
+    While an update is waiting to be sent, newer values of the status and percentage of the same execution replace
+    the pending ones; any other change (messages, dashboard) is sent in its own request. Status, percentage and
+    dashboard are not sent again if equal to the values last accepted by the Portal for the execution, updates
+    without changes are skipped. Executions with pending updates are served in turns."""
+
+    maxTracked = 100
+    coalesced = ('Status', 'PerCent')
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.condition = Condition()
+        # Dict[(<api url>, <execution id>): (<client>, <latest status/percentage>, <other updates, in order>)]
+        self.pending: OrderedDict[Tuple[str, int], Tuple['PortalApi', Dict, List[Dict]]] = OrderedDict()
+        self.Sent = 0
+        self.Merged = 0
+        self.Skipped = 0
+        self.last: OrderedDict[Tuple[str, int], Dict] = OrderedDict()  # Values sent for the latest executions
+        self.thread = Thread(target=self._run, name="PortalWorker", daemon=True)
+        self.thread.start()
+
+    @property
+    def Depth(self) -> int:
+        return len(self.pending)
+
+    def Put(self, client: 'PortalApi', executionId: int, update: Dict):
+        with self.condition:
+            key = (client.api_url, executionId)
+            _, state, updates = self.pending.setdefault(key, (client, {}, []))
+            latest = {field: value for field, value in update.items() if field in self.coalesced}
+            others = {field: value for field, value in update.items() if field not in self.coalesced}
+            if any(field in state for field in latest):
+                self.Merged += 1
+            state.update(latest)
+            if len(others) != 0:
+                updates.append(others)
+            self.condition.notify()
+
+    def _next(self) -> Tuple[Tuple[str, int], 'PortalApi', Dict]:
+        """Takes the latest status/percentage and the oldest remaining update of the first execution in turn"""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.pending) != 0)
+            key, (client, state, updates) = next(iter(self.pending.items()))
+            update = {**state, **(updates.pop(0) if len(updates) != 0 else {})}
+            state.clear()
+            if len(updates) == 0:
+                self.pending.pop(key)
+            else:
+                self.pending.move_to_end(key)
+            return key, client, update
+
+    def _run(self):
+        from Helper import Log
+        while True:
+            key, client, update = self._next()
+
+            last = self.last.setdefault(key, {})
+            self.last.move_to_end(key)
+            if len(self.last) > self.maxTracked:
+                self.last.popitem(last=False)
+            update = {field: value for field, value in update.items()
+                      if field == 'Message' or last.get(field, None) != value}
+            if len(update) == 0:
+                self.Skipped += 1
+                continue
+
+            executionId = key[1]
+            try:
+                client.HttpPatch(f'{client.api_url}/execution/{executionId}',
+                                 {'Content-Type': 'application/json'}, json.dumps(update))
+                self.Sent += 1
+                last.update(update)
+                last.pop('Message', None)
+            except Exception as e:
+                Log.W(f"Could not send update of execution {executionId} to the Portal: {e}")
+                self.last.pop(key, None)  # Send every value again with the next update
+            sleep(self.interval)
+
+
 class PortalApi(RestClient):
+    worker: Optional[portalWorker] = None  # Shared by all instances
+    lock = Lock()
+
     def __init__(self, config: PortalConfig):
         self.Enabled = config.Enabled
         super().__init__(config.Host, config.Port, '/api')
+        if self.Enabled and PortalApi.worker is None:
+            with PortalApi.lock:
+                if PortalApi.worker is None:
+                    PortalApi.worker = portalWorker(config.UpdateInterval)
+
+    @classmethod
+    def Status(cls) -> Dict[str, int]:
+        worker = cls.worker
+        if worker is None:
+            return {'QueueDepth': 0, 'Sent': 0, 'Merged': 0, 'Skipped': 0}
+        return {'QueueDepth': worker.Depth, 'Sent': worker.Sent, 'Merged': worker.Merged, 'Skipped': worker.Skipped}
 
     def UpdateExecutionData(self, executionId: int,
                             status: Optional[str] = None, dashboardUrl: Optional[str] = None,
                             percent: Optional[int] = None, message: Optional[str] = None):
-        if self.Enabled:
-            Thread(target=self.updateAsync,
-                   args=(executionId, status, dashboardUrl, percent, message)).start()
-
-    def updateAsync(self, executionId: int,
-                    status: Optional[str], dashboardUrl: Optional[str],
-                    percent: Optional[int], message: Optional[str]):
 
         def _maybeAdd(key: str, value: Union[str, int]):
             if value is not None: payload[key] = value
 
-        url = f'{self.api_url}/execution/{executionId}'
-        payload = {}
+        if self.Enabled:
+            payload = {}
 
-        _maybeAdd('Status', status)
-        _maybeAdd('Dashboard', dashboardUrl)
-        _maybeAdd('PerCent', percent)
-        _maybeAdd('Message', message)
+            _maybeAdd('Status', status)
+            _maybeAdd('Dashboard', dashboardUrl)
+            _maybeAdd('PerCent', percent)
+            _maybeAdd('Message', message)
 
-        self.HttpPatch(url, {'Content-Type': 'application/json'}, json.dumps(payload))
+            self.worker.Put(self, executionId, payload)
@@ -1,13 +1,25 @@
 from REST import RestClient
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Iterator
 from Helper import Log
 from time import sleep
-from json import dumps
+from json import dumps, loads
+from urllib3 import Timeout
+from urllib.parse import urlencode
+
+
+class RemoteResultsError(RuntimeError):
+    """Failure reported by the remote side while retrieving the results, repeating the request would not help"""
+    pass
 
 
 class RemoteApi(RestClient):
+    NDJSON = 'application/x-ndjson'
+
     def __init__(self, host, port):
         super().__init__(host, port, '/distributed')
+        self.ResultsComplete = False  # Whether the last call to StreamResults retrieved all the results
+        self.IncrementalResults: Optional[bool] = None  # Whether the peer supports the 'since' parameter
+        self.LongPoll = True  # Whether the peer supports the milestones (long-poll) endpoint
 
     def Run(self, descriptor: Dict) -> [int | None]:
         response = self.HttpPost(f'{self.api_url}/run',
@@ -17,8 +29,7 @@ class RemoteApi(RestClient):
     def GetStatus(self, remoteId: int) -> Tuple[Optional['ExperimentStatus'], List[str]]:
         from Experiment import ExperimentStatus
         try:
-            response = self.HttpGet(f'{self.api_url}/{remoteId}/status')
-            data: Dict = self.ResponseToJson(response)
+            data: Dict = self.HttpGetJson(f'{self.api_url}/{remoteId}/status')
             if data['success']:
                 return ExperimentStatus[data['status']], data['milestones']
             else:
@@ -27,10 +38,41 @@ class RemoteApi(RestClient):
             Log.E(f"GetStatus error: {e}")
             return None, []
 
-    def GetAllValues(self, remoteId: int) -> Dict[str, str]:
+    def WaitForChange(self, remoteId: int, revision: Optional[int], wait: float,
+                      value: Optional[str] = None) -> Optional[Dict]:
+        """Long-polls the remote side until its revision differs from `revision` (a new milestone, change of status
+        or published value) or `wait` seconds have passed. Returns a dictionary with the 'status', 'milestones',
+        'revision' and (if requested) 'value' of the remote execution, or None if the request failed or the
+        remote side does not support long-polling."""
+        from Experiment import ExperimentStatus
+        if not self.LongPoll: return None
+        params = {'wait': int(wait)}
+        if revision is not None: params['after'] = revision
+        if value is not None: params['value'] = value
         try:
-            response = self.HttpGet(f'{self.api_url}/{remoteId}/values')
+            response = self.HttpGet(f'{self.api_url}/{remoteId}/milestones?{urlencode(params)}',
+                                    timeout=Timeout(connect=10, read=wait + 30))
+            status, success = self.ResponseStatusCode(response)
+            if status == 404:
+                Log.W("Remote side does not support long-polling, using periodic requests")
+                self.LongPoll = False
+                return None
+            if status == 503:
+                Log.D("Remote side is busy, retrying the long-poll request later")
+                return None
             data: Dict = self.ResponseToJson(response)
+            if data['success']:
+                return {'status': ExperimentStatus[data['status']], 'milestones': data['milestones'],
+                        'revision': data.get('revision', None), 'value': data.get('value', None)}
+            else:
+                raise RuntimeError(data['message'])
+        except Exception as e:
+            Log.E(f"WaitForChange error: {e}")
+            return None
+
+    def GetAllValues(self, remoteId: int) -> Dict[str, str]:
+        try:
+            data: Dict = self.HttpGetJson(f'{self.api_url}/{remoteId}/values')
             if data['success']:
                 return data['values']
             else:
@@ -41,8 +83,7 @@ class RemoteApi(RestClient):
 
     def GetValue(self, remoteId: int, name: str = None) -> Optional[str]:
         try:
-            response = self.HttpGet(f'{self.api_url}/{remoteId}/values/{name}')
-            data: Dict = self.ResponseToJson(response)
+            data: Dict = self.HttpGetJson(f'{self.api_url}/{remoteId}/values/{name}')
             if data['success']:
                 return data['value']
             else:
@@ -51,49 +92,103 @@ class RemoteApi(RestClient):
             Log.E(f"GetValue error: {e}")
             return None
 
-    def GetResults(self, remoteId: int) -> List['InfluxPayload']:
-        from Helper import InfluxPayload
+    def GetResults(self, remoteId: int, since: Optional[Dict[str, int]] = None) -> List['ColumnarPayload']:
+        return list(self.StreamResults(remoteId, since))
+
+    def StreamResults(self, remoteId: int, since: Optional[Dict[str, int]] = None) -> Iterator['ColumnarPayload']:
+        """Retrieves the results of the remote execution, yielding each payload as it is received. Peers that
+        support it send the results as binary columnar frames or NDJSON (one frame/line per chunk of points),
+        older peers as a single JSON document.
+        If the transfer fails it is retried, skipping the payloads that were already yielded. Failures reported
+        by the remote side are not retried, in that case ResultsComplete remains False.
+        `since` contains per-measurement cursors (nanoseconds), only newer points are retrieved for these."""
         url = f'{self.api_url}/{remoteId}/results'
+        if since:
+            url += '?' + urlencode([('since', f'{measurement}:{cursor}') for measurement, cursor in since.items()])
         retries = 5
+        received = 0
+        self.ResultsComplete = False
 
         while retries > 0:
             try:
-                response = self.HttpGet(url, timeout=120)
+                for index, payload in enumerate(self.requestResults(url)):
+                    if index >= received:
+                        received += 1
+                        yield payload
+                self.ResultsComplete = True
+                return
+            except RemoteResultsError as e:
+                Log.E(f"GetResults error reported by the remote side: {e}")
+                return
+            except Exception as e:
+                Log.E(f"GetResults error: {e}")
+                retries -= 1
+                sleep(5)
+
+    def requestResults(self, url: str) -> Iterator['ColumnarPayload']:
+        from Helper import ColumnarPayload, BinaryFrames
+        accept = f'{BinaryFrames.Mimetype}, {self.NDJSON};q=0.9, application/json;q=0.5'
+        response = self.HttpGet(url, {'Accept': accept}, timeout=Timeout(connect=10, read=120), stream=True)
+        finished = False
+        try:
+            status, success = self.ResponseStatusCode(response)
+            if not success: raise RuntimeError(f'Status {status}')
 
-                status, success = self.ResponseStatusCode(response)
-                if not success: raise RuntimeError(f'Status {status}')
+            contentType = response.headers.get('Content-Type', '')
+            if contentType.startswith(BinaryFrames.Mimetype):
+                frames = BinaryFrames.Read(response)
+            elif contentType.startswith(self.NDJSON):
+                frames = ((loads(line.decode('utf-8')), None) for line in response if len(line.strip()) != 0)
+            else:
+                json = loads(response.read().decode('utf-8'))
+                finished = True
+                self.IncrementalResults = json.get('incremental', False)
+                yield from self.parseJsonResults(json)
+                return
 
-                json = self.ResponseToJson(response)
-                if not json['success']:
-                    if "Database not available" in json["message"]:
-                        return []
+            for entry, body in frames:
+                if 'measurement' in entry:
+                    if body is None:
+                        yield ColumnarPayload.FromEastWestData(entry['measurement'], entry['tags'], entry['header'],
+                                                               entry['points'], entry.get('utc', False))
                     else:
-                        raise RuntimeError(json['message'])
+                        yield ColumnarPayload.FromBinaryColumns(
+                            entry['measurement'], entry['tags'], entry['count'], entry['columns'], body)
+                elif 'success' in entry:
+                    finished = True
+                    if not self.checkResultsReply(entry): return
+                    self.IncrementalResults = entry.get('incremental', False)
+            if not finished:
+                raise RuntimeError("Incomplete results stream")
+        finally:
+            if finished:
+                response.release_conn()
+            else:  # Do not return a connection with unread data to the pool
+                response.close()
 
-                measurements = json['measurements']
-                data = json['data']
-                res = []
+    @staticmethod
+    def checkResultsReply(reply: Dict) -> bool:
+        """Returns False if the remote side has no results to send (no database), raises RemoteResultsError for
+        other failures. Used for the JSON reply and the final frame of the streamed variants."""
+        if reply['success']:
+            return True
+        if "Database not available" in reply['message']:
+            return False
+        raise RemoteResultsError(reply['message'])
 
-                for measurement in measurements:
-                    for singlePayload in data[measurement]:
-                        influxPayload = InfluxPayload.FromEastWestData(
-                            measurement, singlePayload['tags'], singlePayload['header'], singlePayload['points'])
-                        res.append(influxPayload)
+    @classmethod
+    def parseJsonResults(cls, json: Dict) -> Iterator['ColumnarPayload']:
+        from Helper import ColumnarPayload
+        if not cls.checkResultsReply(json): return
 
-                return res
-            except Exception as e:
-                Log.E(f"GetResults error: {e}")
-                retries -= 1
-                sleep(5)
+        measurements = json['measurements']
+        data = json['data']
 
-        return []
+        for measurement in measurements:
+            for singlePayload in data[measurement]:
+                yield ColumnarPayload.FromEastWestData(measurement, singlePayload['tags'], singlePayload['header'],
+                                                       singlePayload['points'], singlePayload.get('utc', False))
 
     def GetFiles(self, remoteId: int, outputPath: str) -> Optional[str]:
-        retries = 5
-        file = None
-        while retries > 0 and file is None:
-            file = self.DownloadFile(f"{self.api_url}/{remoteId}/files", outputPath)
-            if file is None:
-                retries -= 1
-                sleep(5)
-        return file
+        """Downloads the results file of the remote execution, resuming the transfer on failures (up to 5 retries)"""
+        return self.DownloadFile(f"{self.api_url}/{remoteId}/files", outputPath, retries=5, retryDelay=5)
@@ -1 +1,2 @@
 from .rest_client import RestClient, Payload
+from .transport import Transport
@@ -1,9 +1,12 @@
 import re
 import json
-from typing import Dict, Union, Optional
-from urllib3 import connection_from_url
-from requests import post
-from os.path import realpath, join
+from typing import Dict, Union, Optional, Tuple
+from urllib3 import Timeout
+from .transport import Transport
+from os import remove, replace
+from os.path import realpath, join, isfile, basename
+from hashlib import sha256
+from time import sleep
 from enum import Enum, unique
 from datetime import datetime
 
@@ -23,13 +26,9 @@ class RestClient:
         protocol = f'http{"s" if https else ""}://'
         port = api_port if api_port is not None else (443 if https else 80)
         self.api_url = f'{protocol}{api_host}:{port}{suffix}'
-
-        kw = {'maxsize': 1, 'headers': self.HEADERS}
-        if https and insecure:
-           kw['cert_reqs'] = 'CERT_NONE'
-
-        self.pool = connection_from_url(self.api_url, **kw)
+        self.pool = Transport.Pool(self.api_url, insecure=https and insecure)  # Shared by all clients of the host
         self.insecure = insecure
+        self.cached: Dict[str, Tuple[str, object]] = {}  # url -> (ETag, JSON), see HttpGetJson
 
     def GetTraceId(self):
         return str(int(datetime.now().timestamp()*1000000))[-8:]
@@ -54,18 +53,62 @@ class RestClient:
         Log.D(f'[{traceId}] << [Code {code}] {body}')
         return response
 
-    def DownloadFile(self, url, output_folder) -> Optional[str]:
-        try:
-            response = self.HttpGet(url)
-            filename = self.GetFilename(response.headers["Content-Disposition"])
-            output_file = realpath(join(output_folder, filename))
-        except Exception:
+    def DownloadFile(self, url, output_folder, retries: int = 0, retryDelay: float = 5,
+                     chunkSize: int = 1024 * 1024) -> Optional[str]:
+        """Downloads a file, writing it to disk in chunks of `chunkSize` bytes. If the transfer fails it is retried
+        (up to `retries` times), resuming from the received data with an HTTP Range request when the server
+        supports it. If the server provides a checksum (X-Checksum-SHA256 header) the file is verified once
+        completed. Returns the path of the downloaded file, or None if it could not be retrieved."""
+        from Helper import Log
+        output_file = partial_file = checksum = etag = None
+        received, hasher = 0, sha256()
+
+        for attempt in range(retries + 1):
+            if attempt != 0:
+                sleep(retryDelay)
+
+            headers = {}
+            if received != 0:
+                headers['Range'] = f'bytes={received}-'
+                if etag is not None:
+                    headers['If-Range'] = etag  # Receive the complete file if it has changed
+            response = None
+            try:
+                response = self.HttpGet(url, headers, timeout=Timeout(connect=10, read=60), stream=True)
+                if response.status == 206 and received != 0:
+                    Log.D(f"Resuming download of {output_file} from byte {received}")
+                elif response.status == 200:
+                    filename = self.GetFilename(response.headers["Content-Disposition"])
+                    output_file = realpath(join(output_folder, filename))
+                    partial_file = f'{output_file}.part'
+                    checksum = response.headers.get('X-Checksum-SHA256', None)
+                    etag = response.headers.get('ETag', None)
+                    received, hasher = 0, sha256()
+                else:
+                    raise RuntimeError(f"Unexpected status {response.status}")
+
+                with open(partial_file, 'ab' if received != 0 else 'wb') as out:
+                    for chunk in response.stream(chunkSize):
+                        out.write(chunk)
+                        hasher.update(chunk)
+                        received += len(chunk)
+                response.release_conn()
+                break
+            except Exception as e:
+                Log.W(f"Error while downloading {url} (attempt {attempt + 1} of {retries + 1}): {e}")
+                if response is not None:
+                    response.close()
+        else:
+            if partial_file is not None and isfile(partial_file):
+                remove(partial_file)
             return None
 
-        with open(output_file, 'wb+') as out:
-            out.write(response.data)
+        if checksum is not None and checksum.lower() != hasher.hexdigest():
+            Log.E(f"Checksum mismatch for {output_file}, discarding file")
+            remove(partial_file)
+            return None
 
-        response.release_conn()
+        replace(partial_file, output_file)
         return output_file
 
     def GetFilename(self, content_disposition):
@@ -74,13 +117,40 @@ class RestClient:
             return result.group(1)
         return "unknown_filename"
 
-    def HttpGet(self, url, extra_headers=None, timeout=10):
+    def HttpGet(self, url, extra_headers=None, timeout=10, stream=False):
+        """If stream is True the body is not read in advance (nor logged), use the response as an iterator
+        of lines or read it in chunks, and call release_conn once finished"""
         traceId = self.GetTraceId()
         extra_headers = {} if extra_headers is None else extra_headers
 
         self.Trace(traceId, url, 'GET', headers=extra_headers)
-        return self.DumpResponse(traceId, self.pool.request('GET', url, headers=extra_headers,
-                                                            retries=self.RETRIES, timeout=timeout))
+        response = self.pool.request('GET', url, headers=extra_headers, retries=self.RETRIES, timeout=timeout,
+                                     preload_content=not stream)
+        if stream:
+            from Helper import Log
+            Log.D(f'[{traceId}] << [Code {response.status}] (Streamed response)')
+            return response
+        return self.DumpResponse(traceId, response)
+
+    def HttpGetJson(self, url, extra_headers=None, timeout=10) -> object:
+        """Retrieves and parses a JSON document. If the server tagged a previous reply (ETag) the request is
+        conditional, and the cached document is returned if it has not been modified (status 304)"""
+        headers = {} if extra_headers is None else dict(extra_headers)
+        etag, data = self.cached.get(url, (None, None))
+        if etag is not None:
+            headers['If-None-Match'] = etag
+
+        response = self.HttpGet(url, headers, timeout=timeout)
+        if response.status == 304 and etag is not None:
+            return data
+
+        data = self.ResponseToJson(response)
+        etag = response.headers.get('ETag', None)
+        if etag is not None and 200 <= response.status <= 299:
+            self.cached[url] = (etag, data)
+        else:
+            self.cached.pop(url, None)
+        return data
 
     def HttpPost(self, url, extra_headers=None, body: Optional[Union[str, Dict]] = None,
                  files=None, payload: Payload = None, timeout=10):
@@ -111,8 +181,26 @@ class RestClient:
                                                        retries=self.RETRIES, timeout=timeout))
         else:
             return self.DumpResponse(traceId,
-                                     post(f"{self.api_url}{url}", data=body, headers={**self.HEADERS, **extra_headers},
-                                          files=files, verify=not self.insecure))
+                                     self.pool.request('POST', f"{self.api_url}{url}",
+                                                       fields={**body, **self.multipartFiles(files)},
+                                                       headers={**self.HEADERS, **extra_headers},
+                                                       retries=self.RETRIES, timeout=timeout))
+
+    @staticmethod
+    def multipartFiles(files: Dict) -> Dict:
+        """Converts the files of a POST request (in the same formats accepted by `requests`: a file object or a
+        tuple of (filename, file object or content[, content type])) to multipart fields"""
+        def _read(content):
+            return content.read() if hasattr(content, 'read') else content
+
+        res = {}
+        for name, value in files.items():
+            if isinstance(value, (tuple, list)):
+                filename, content, *rest = value
+                res[name] = (filename, _read(content), *rest[:1])
+            else:
+                res[name] = (basename(getattr(value, 'name', name)), _read(value))
+        return res
 
     def HttpPatch(self, url, extra_headers=None, body='', timeout=10):
         traceId = self.GetTraceId()
@@ -0,0 +1,65 @@
+from threading import Lock
+from typing import Dict, Tuple
+from urllib3 import HTTPConnectionPool, connection_from_url
+from urllib.parse import urlsplit
+
+
+class Transport:
+    """Process-wide pools of keep-alive connections, shared by all the REST clients. A pool is created for each
+    combination of scheme, host and port (plus certificate verification mode for https), holding up to
+    `HttpPoolSize` idle connections. Additional concurrent requests use new connections that are closed after
+    use instead of waiting for a free one."""
+
+    HEADERS = {'Accept-Language': 'en-US;q=0.5,en;q=0.3'}
+    DEFAULT_POOL_SIZE = 10
+
+    _lock = Lock()
+    _pools: Dict[Tuple[str, str, int, bool], HTTPConnectionPool] = {}
+
+    @classmethod
+    def poolSize(cls) -> int:
+        try:
+            from Settings import Config  # Delayed, the configuration validation also uses the REST clients
+            return Config().HttpPoolSize
+        except Exception:
+            return cls.DEFAULT_POOL_SIZE
+
+    @classmethod
+    def Pool(cls, url: str, insecure: bool = False) -> HTTPConnectionPool:
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port, insecure and scheme == 'https')
+
+        pool = cls._pools.get(key, None)
+        if pool is None:
+            size = cls.poolSize()  # Outside the lock, loading the configuration may create other clients
+            with cls._lock:
+                pool = cls._pools.get(key, None)
+                if pool is None:
+                    kw = {'maxsize': size, 'block': False, 'headers': cls.HEADERS}
+                    if key[3]:
+                        kw['cert_reqs'] = 'CERT_NONE'
+                    pool = cls._pools[key] = connection_from_url(f'{scheme}://{parts.hostname}:{port}', **kw)
+        return pool
+
+    @classmethod
+    def Status(cls) -> Dict[str, Dict[str, int]]:
+        """Usage of each pool: requests sent, connections opened, requests that reused an open connection and
+        connections currently idle in the pool"""
+        res = {}
+        with cls._lock:
+            pools = list(cls._pools.items())
+        for (scheme, host, port, insecure), pool in pools:
+            name = f'{scheme}://{host}:{port}' + (' (insecure)' if insecure else '')
+            res[name] = {'Requests': pool.num_requests, 'Connections': pool.num_connections,
+                         'Reused': max(0, pool.num_requests - pool.num_connections),
+                         'Idle': sum(1 for connection in list(pool.pool.queue) if connection is not None)}
+        return res
+
+    @classmethod
+    def Close(cls):
+        with cls._lock:
+            pools, cls._pools = list(cls._pools.values()), {}
+        for pool in pools:
+            pool.close()
@@ -1,5 +1,5 @@
 from flask import Flask
-from Helper import Log
+from Helper import Log, InfluxDb
 from Status import Status
 from flask_bootstrap import Bootstrap
 from flask_moment import Moment
@@ -48,6 +48,9 @@ Log.Initialize(app)
 Status.Initialize()
 HeartBeat.Initialize()
 
+if config.InfluxDb.Enabled and config.InfluxDb.Spool:
+    InfluxDb.Writer()  # Starts replaying any values left in the spool by a previous run
+
 from Scheduler.execution import bp as ExecutionBp
 app.register_blueprint(ExecutionBp, url_prefix='/execution', name='deprecatedExecutionApi')
 app.register_blueprint(ExecutionBp, url_prefix='/elcm/api/v1/execution')
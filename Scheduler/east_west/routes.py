@@ -1,13 +1,21 @@
 from Scheduler.east_west import bp
-from Scheduler.execution import handleExecutionResults, executionOrTombstone
-from flask import jsonify, request, json, redirect, url_for
+from Scheduler.execution import handleExecutionResults, executionOrTombstone, executionETag, conditionalReply
+from flask import jsonify, request, json, redirect, url_for, Response, stream_with_context
 from Status import ExecutionQueue
-from Helper import InfluxDb
+from Experiment import ExperimentStatus
+from Helper import InfluxDb, ColumnarPayload, BinaryFrames, Log
+from Helper.influx import ToNanoseconds
 from Settings import Config
+from typing import Callable, Dict, Iterator, Optional
+from threading import BoundedSemaphore
 
 
 notFound = {'success': False, 'message': 'Execution ID not found'}
 hiddenVariables = ['Configuration', 'Descriptor']
+ndjsonMimetype = 'application/x-ndjson'
+maxLongPollWait = 60
+longPolls = BoundedSemaphore(max(1, Config().EastWest.MaxLongPolls))  # Each waiting request holds a server thread
+streamChunkSize = 5000
 
 @bp.route('/run', methods=['POST'])
 def start():
@@ -35,7 +43,12 @@ def peer(executionId: int):
 
 @bp.route('/<int:executionId>/status')
 def status(executionId: int):
-    execution = executionOrTombstone(executionId)
+    tag, execution = executionETag(executionId)
+    return conditionalReply(tag, lambda: statusReply(executionId, execution))
+
+
+def statusReply(executionId: int, execution):
+    execution = execution or executionOrTombstone(executionId)
     if execution is not None:
         payload = {'success': True, 'status': execution.CoarseStatus.name, 'milestones': execution.Milestones,
                    'message': f'Status of execution {executionId} retrieved successfully'}
@@ -44,10 +57,44 @@ def status(executionId: int):
         return jsonify(notFound)
 
 
+@bp.route('/<int:executionId>/milestones')
+def milestones(executionId: int):
+    """Long-poll variant of the status: if the revision of the execution is still 'after', waits (up to 'wait'
+    seconds) until a milestone is reached, the status changes or a value is published. The value of the variable
+    in 'value', if any, is included in the reply. Replies with status 503 if too many requests are waiting."""
+    execution = executionOrTombstone(executionId)
+    if execution is None:
+        return jsonify(notFound)
+
+    after = request.args.get('after', None, type=int)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), maxLongPollWait)
+    name = request.args.get('value', None)
+    revision = getattr(execution, 'Revision', None)
+    if after is not None and revision is not None and execution.CoarseStatus.value < ExperimentStatus.Finished.value:
+        if not longPolls.acquire(blocking=False):
+            return jsonify({'success': False, 'message': 'Too many requests waiting for changes, retry later'}), 503
+        try:
+            revision = execution.WaitForChange(after, wait)
+        finally:
+            longPolls.release()
+
+    payload = {'success': True, 'status': execution.CoarseStatus.name, 'milestones': list(execution.Milestones),
+               'revision': revision, 'message': f'Milestones of execution {executionId} retrieved successfully'}
+    if name is not None:
+        value = execution.Params.get(name, None)
+        payload['value'] = str(value) if value is not None and name not in hiddenVariables else None
+    return jsonify(payload)
+
+
 @bp.route('/<int:executionId>/values')
 @bp.route('/<int:executionId>/values/<name>')
 def values(executionId: int, name: str = None):
     execution = ExecutionQueue.Find(executionId)
+    tag = f'{executionId}-{execution.Revision}' if execution is not None else None
+    return conditionalReply(tag, lambda: valuesReply(executionId, execution, name))
+
+
+def valuesReply(executionId: int, execution, name: Optional[str]):
     if execution is not None:
         variables = {}
         for key, value in execution.Params.items():
@@ -67,35 +114,94 @@ def values(executionId: int, name: str = None):
         return jsonify(notFound)
 
 
+def eastWestEntries(payload, chunkSize: Optional[int] = None) -> Iterator[Dict]:
+    """Converts a payload to the east/west results format, optionally split in entries of up to chunkSize points"""
+    if len(payload.Points) == 0: return
+    header = list(payload.Points[0].Fields.keys())
+    size = chunkSize or len(payload.Points)
+    for start in range(0, len(payload.Points), size):
+        points = []
+        for point in payload.Points[start:start + size]:
+            fields = point.Fields
+            values = [fields[value] for value in header]
+            points.append([ToNanoseconds(point.Time) / 1e9, values])
+        yield {'tags': payload.Tags, 'header': header, 'points': points, 'utc': True}
+
+
+def ndjsonFrames(header: Dict, payload=None) -> Iterator[bytes]:
+    entries = [{}] if payload is None else eastWestEntries(payload, streamChunkSize)
+    for entry in entries:
+        yield (json.dumps({**header, **entry}) + '\n').encode('utf-8')
+
+
+def binaryFrames(header: Dict, payload=None) -> Iterator[bytes]:
+    if payload is None:
+        yield BinaryFrames.Encode(header)
+        return
+    for chunk in ColumnarPayload.FromPayload(payload).Slices(streamChunkSize):
+        columns, body = chunk.BinaryColumns
+        yield BinaryFrames.Encode({**header, 'tags': chunk.Tags, 'count': chunk.PointCount, 'columns': columns}, body)
+
+
+def parseSince() -> Dict[str, int]:
+    """Per-measurement cursors of the request, as 'since=<measurement>:<nanoseconds>' parameters (repeatable).
+    Only the points newer than the cursor are returned for these measurements, all of them for the rest"""
+    res = {}
+    for value in request.args.getlist('since'):
+        measurement, _, cursor = value.rpartition(':')
+        if len(measurement) == 0:
+            raise ValueError(f"Invalid cursor '{value}', expected <measurement>:<nanoseconds>")
+        res[measurement] = int(cursor)
+    return res
+
+
+def streamResults(executionId: int, influx: InfluxDb, frames: Callable, since: Dict[str, int]) -> Iterator[bytes]:
+    """Streamed variants of the results: a frame with the list of measurements, one frame per chunk of (up to
+    streamChunkSize) points, each one including its measurement, and a final frame with the success flag.
+    `frames` encodes each part, either as lines of NDJSON (ndjsonFrames) or as binary frames (binaryFrames)"""
+    try:
+        measurements = influx.GetExecutionMeasurements(executionId)
+        yield from frames({'measurements': measurements})
+
+        # One tag set at a time, retrieving several measurements in advance would defeat the bounded memory
+        for measurement in measurements:
+            for payload in influx.GetMeasurementStream(executionId, measurement, since=since.get(measurement)):
+                yield from frames({'measurement': measurement}, payload)
+
+        yield from frames({'success': True, 'incremental': True,
+                           'message': f"Results for execution {executionId} retrieved successfully"})
+    except Exception as e:
+        Log.E(f"Exception while streaming results of execution {executionId}: {e}")
+        yield from frames({'success': False, 'message': f"Exception while retrieving results: {e}"})
+
+
 @bp.route('/<int:executionId>/results')
 def results(executionId: int):
     execution = executionOrTombstone(executionId)
+    mimetype = request.accept_mimetypes.best_match(['application/json', ndjsonMimetype, BinaryFrames.Mimetype])
     if execution is not None:
         if Config().InfluxDb.Enabled:
+            try:
+                since = parseSince()
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)})
+
             influx = InfluxDb()
+            if mimetype in [ndjsonMimetype, BinaryFrames.Mimetype]:
+                frames = ndjsonFrames if mimetype == ndjsonMimetype else binaryFrames
+                return Response(stream_with_context(streamResults(executionId, influx, frames, since)),
+                                mimetype=mimetype)
+
             measurements = influx.GetExecutionMeasurements(executionId)
             data = {}
 
-            for measurement in measurements:
-                payloads = influx.GetMeasurement(executionId, measurement)
+            for measurement, payloads in influx.GetMeasurements(executionId, measurements, since):
                 data[measurement] = []
 
                 for payload in payloads:
-                    if len(payload.Points) != 0:
-                        header = list(payload.Points[0].Fields.keys())
-                        points = []
-                        for point in payload.Points:
-                            fields = point.Fields
-                            values = [fields[value] for value in header]
-
-                            points.append([point.Time.timestamp(), values])
-                        data[measurement].append({
-                            'tags': payload.Tags,
-                            'header': header,
-                            'points': points
-                        })
-
-            return jsonify({'success': True, 'measurements': measurements, 'data': data,
+                    data[measurement].extend(eastWestEntries(payload))
+
+            return jsonify({'success': True, 'incremental': True, 'measurements': measurements, 'data': data,
                             'message': f"Results for execution {executionId} retrieved successfully"})
         else:
             return {'success': False, 'message': 'Database not available'}
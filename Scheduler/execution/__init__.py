@@ -3,4 +3,4 @@ from flask import Blueprint
 bp = Blueprint('execution', __name__)
 
 from Scheduler.execution import routes
-from Scheduler.execution.routes import handleExecutionResults, executionOrTombstone
+from Scheduler.execution.routes import handleExecutionResults, executionOrTombstone, executionETag, conditionalReply
@@ -1,11 +1,12 @@
-from flask import redirect, url_for, flash, render_template, jsonify, send_from_directory
+from flask import redirect, url_for, flash, render_template, jsonify, send_from_directory, request, make_response
 from Status import Status, ExecutionQueue
 from Experiment import ExperimentRun, Tombstone
 from Scheduler.execution import bp
-from typing import Union, Optional
+from typing import Union, Optional, Callable, Tuple
 from Settings import Config
 from Data import ExperimentDescriptor
 from Facility import Facility
+from Helper import IO, Serialize
 from os.path import join, isfile, abspath
 
 
@@ -52,7 +53,12 @@ def view(executionId: int):
 @bp.route('<int:executionId>/json')
 @bp.route('<int:executionId>/status')
 def json(executionId: int):
-    execution = executionOrTombstone(executionId)
+    tag, execution = executionETag(executionId)
+    return conditionalReply(tag, lambda: jsonStatus(executionId, execution))
+
+
+def jsonStatus(executionId: int, execution: Optional[ExperimentRun]):
+    execution = execution or executionOrTombstone(executionId)
     coarse = status = 'ERR'
     verdict = 'NotSet'
     percent = 0
@@ -73,6 +79,31 @@ def json(executionId: int):
     })
 
 
+def executionETag(executionId: int) -> Tuple[Optional[str], Optional[ExperimentRun]]:
+    """Returns the entity tag of the current state of an execution, along with the execution if it is running.
+    Running executions are tagged with their revision (increased on every change), finished executions do not
+    change, so they can be tagged without loading the Tombstone"""
+    execution = ExecutionQueue.Find(executionId)
+    if execution is not None:
+        return f'{executionId}-{execution.Revision}', execution
+    if isfile(Serialize.Path('Execution', str(executionId))):
+        return f'{executionId}-final', None
+    return None, None
+
+
+def conditionalReply(tag: Optional[str], reply: Callable):
+    """Replies with '304 Not Modified' if the client already has the tagged version, otherwise generates the
+    reply and adds the ETag. The tag must be obtained before generating the reply"""
+    if tag is not None and request.if_none_match.contains(tag):
+        response = make_response('', 304)
+    else:
+        response = make_response(reply())
+    if tag is not None:
+        response.set_etag(tag)
+        response.cache_control.no_cache = True
+    return response
+
+
 def executionOrTombstone(executionId: int) -> Optional[Union[ExperimentRun, Tombstone]]:
     execution = ExecutionQueue.Find(executionId)
     if execution is None:
@@ -121,7 +152,10 @@ def handleExecutionResults(executionId: int):
         folder = abspath(Config().ResultsFolder)
         filename = f"{executionId}.zip"
         if isfile(join(folder, filename)):
-            return send_from_directory(folder, filename, as_attachment=True)
+            # Range requests are handled by send_from_directory, the checksum allows clients to verify resumed downloads
+            response = send_from_directory(folder, filename, as_attachment=True)
+            response.headers['X-Checksum-SHA256'] = IO.FileChecksum(join(folder, filename))
+            return response
         else:
             return f"No results for execution {executionId}", 404
     else:
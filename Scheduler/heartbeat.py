@@ -1,23 +1,31 @@
 from Helper import Child
 from typing import Dict
 from Helper import Level
-from time import sleep
+from time import monotonic
 from Status import ExecutionQueue
+from Settings import Config
 
 
 class Beat(Child):
+    """Advances the executions in the queue. Executions are updated as soon as a change is notified (for example,
+    when one of their stages finishes), while all of them are periodically updated (every `HeartbeatInterval`
+    seconds) as a safety net."""
+
     def __init__(self, params: Dict):
         super().__init__(f"HeartBeat")
         self.params = params
 
     def Run(self):
+        nextSweep = 0
+        executionIds = set()
         while not self.stopRequested:
-            ExecutionQueue.UpdateAll()
-            Beat.wait()
-
-    @staticmethod
-    def wait():
-        sleep(10)
+            now = monotonic()
+            if now >= nextSweep:
+                ExecutionQueue.UpdateAll()
+                nextSweep = now + Config().HeartbeatInterval
+            elif len(executionIds) != 0:
+                ExecutionQueue.UpdateAll(executionIds)
+            executionIds = ExecutionQueue.WaitForChanges(max(nextSweep - monotonic(), 0))
 
 
 class HeartBeat:
@@ -28,4 +36,3 @@ class HeartBeat:
         if cls.beat is None:
             cls.beat = Beat(params={})
             cls.beat.Start()
-
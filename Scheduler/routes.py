@@ -1,12 +1,14 @@
 from Scheduler import app
 from Status import Status, ExecutionQueue
 from Experiment import Tombstone
-from flask import render_template, make_response, request, flash, redirect, url_for
+from flask import render_template, make_response, request, flash, redirect, url_for, jsonify
 from functools import wraps, update_wrapper
 from datetime import datetime
-from Helper import Log, Serialize, LogInfo
+from Helper import Log, Serialize, LogInfo, InfluxDb
 from Settings import Config, EvolvedConfig, KAFKAConfig, MQTTConfig, PROMETHEUSConfig, EmailConfig
 from Facility import Facility
+from REST import Transport
+from Interfaces import PortalApi
 from typing import List, Dict
 from flask_paginate import Pagination, get_page_parameter
 
@@ -57,6 +59,21 @@ def log():
     return render_template('mainLog.html', logInfo=Log.RetrieveLogInfo(tail=100))
 
 
+@app.route("/influx_status")
+def influxStatus():
+    return jsonify(InfluxDb.Status())
+
+
+@app.route("/http_status")
+def httpStatus():
+    return jsonify(Transport.Status())
+
+
+@app.route("/portal_status")
+def portalStatus():
+    return jsonify(PortalApi.Status())
+
+
 @app.route("/history")
 def history():
     ids = Serialize.List(False, False, 'Execution')
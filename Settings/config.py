@@ -38,7 +38,9 @@ class Grafana(restApi):
 
 class EastWest(validable):
     def __init__(self, data: Dict):
-        defaults = {'Enabled': (False, Level.WARNING), 'Timeout': (120, Level.INFO)}
+        defaults = {'Enabled': (False, Level.WARNING), 'Timeout': (120, Level.INFO),
+                    'ResultSyncInterval': (30.0, Level.INFO), 'ResultSyncOverlap': (30.0, Level.INFO),
+                    'MaxLongPolls': (4, Level.INFO)}
         super().__init__(data, 'EastWest', defaults)
 
     @property
@@ -49,6 +51,18 @@ class EastWest(validable):
     def Timeout(self):
         return self._keyOrDefault('Timeout')
 
+    @property
+    def ResultSyncInterval(self):
+        return self._keyOrDefault('ResultSyncInterval')
+
+    @property
+    def ResultSyncOverlap(self):
+        return self._keyOrDefault('ResultSyncOverlap')
+
+    @property
+    def MaxLongPolls(self):
+        return self._keyOrDefault('MaxLongPolls')
+
     def GetRemote(self, name: str) -> Tuple[Optional[str], Optional[int]]:
         if self.Enabled:
             remotes = self.data.get('Remotes', {})
@@ -116,7 +130,8 @@ class TapConfig(validable):
 class Portal(restApi):
     def __init__(self, data: Dict):
         defaults = {
-            'Enabled': (False, Level.WARNING)
+            'Enabled': (False, Level.WARNING),
+            'UpdateInterval': (0.1, Level.INFO)
         }
         super().__init__(data, 'Portal', defaults)
 
@@ -124,6 +139,10 @@ class Portal(restApi):
     def Enabled(self):
         return self._keyOrDefault('Enabled')
 
+    @property
+    def UpdateInterval(self):
+        return self._keyOrDefault('UpdateInterval')
+
     @property
     def Validation(self) -> List[Tuple['Level', str]]:
         if self.Enabled:
@@ -139,16 +158,31 @@ class SliceManager(restApi):
 
 class InfluxDb(enabledLoginRestApi):
     def __init__(self, data: Dict):
+        sharedDefaults = {
+            'PoolSize': (10, Level.INFO),
+            'QueryWorkers': (4, Level.INFO),
+            'QueueSize': (10000, Level.INFO),
+            'BatchSize': (5000, Level.INFO),
+            'FlushInterval': (1.0, Level.INFO),
+            'WriteTimeout': (10.0, Level.INFO),
+            'Gzip': (False, Level.INFO),
+            'Spool': (False, Level.INFO),
+            'SpoolFolder': ('Spool', Level.INFO),
+            'SpoolSegmentSize': (16, Level.INFO),
+            'RetryInterval': (5.0, Level.INFO)
+        }
         if 'Token' in data.keys() and 'Org' in data.keys():
             defaults = {
                 'Database': (None, Level.ERROR),
                 'Token': (None, Level.WARNING),
-                'Org': (None, Level.WARNING)
+                'Org': (None, Level.WARNING),
+                **sharedDefaults
             }
             super().__init__(data, 'InfluxDb V2', defaults)
         else:
             defaults = {
                 'Database': (None, Level.ERROR),
+                **sharedDefaults
             }
             super().__init__(data, 'InfluxDb V1', defaults)
 
@@ -164,6 +198,50 @@ class InfluxDb(enabledLoginRestApi):
     def Org(self):
         return self._keyOrDefault('Org')
 
+    @property
+    def PoolSize(self):
+        return self._keyOrDefault('PoolSize')
+
+    @property
+    def QueryWorkers(self):
+        return self._keyOrDefault('QueryWorkers')
+
+    @property
+    def QueueSize(self):
+        return self._keyOrDefault('QueueSize')
+
+    @property
+    def BatchSize(self):
+        return self._keyOrDefault('BatchSize')
+
+    @property
+    def FlushInterval(self):
+        return self._keyOrDefault('FlushInterval')
+
+    @property
+    def WriteTimeout(self):
+        return self._keyOrDefault('WriteTimeout')
+
+    @property
+    def Gzip(self):
+        return self._keyOrDefault('Gzip')
+
+    @property
+    def Spool(self):
+        return self._keyOrDefault('Spool')
+
+    @property
+    def SpoolFolder(self):
+        return self._keyOrDefault('SpoolFolder')
+
+    @property
+    def SpoolSegmentSize(self):
+        return self._keyOrDefault('SpoolSegmentSize')
+
+    @property
+    def RetryInterval(self):
+        return self._keyOrDefault('RetryInterval')
+
     @property
     def Validation(self) -> List[Tuple['Level', str]]:
         if self.Token is not None and self.Org is None:
@@ -251,6 +329,18 @@ class Config(ConfigBase):
     def VerdictOnError(self):
         return Config.data.get('VerdictOnError', 'Error')
 
+    @property
+    def HttpPoolSize(self):
+        return Config.data.get('HttpPoolSize', 10)
+
+    @property
+    def HeartbeatInterval(self):
+        return Config.data.get('HeartbeatInterval', 10)
+
+    @property
+    def ResourceScheduler(self):
+        return Config.data.get('ResourceScheduler', 'Fifo')
+
     @property
     def Tap(self):
         return TapConfig(Config.data.get('Tap', {}))
@@ -286,14 +376,22 @@ class Config(ConfigBase):
         keys.discard('TempFolder')
         keys.discard('ResultsFolder')
         keys.discard('VerdictOnError')
+        keys.discard('HttpPoolSize')
+        keys.discard('HeartbeatInterval')
+        keys.discard('ResourceScheduler')
 
         if getenv('SECRET_KEY') is None:
             Config.Validation.append((Level.CRITICAL,
                                       "SECRET_KEY not defined. Use environment variables or set a value in .flaskenv"))
 
-        for key, default in [('TempFolder', 'Temp'), ('ResultsFolder', 'Results'), ('VerdictOnError', 'Error')]:
+        for key, default in [('TempFolder', 'Temp'), ('ResultsFolder', 'Results'), ('VerdictOnError', 'Error'),
+                             ('HttpPoolSize', '10'), ('HeartbeatInterval', '10'), ('ResourceScheduler', 'Fifo')]:
             _validateSingle(key, default)
 
+        if self.ResourceScheduler not in ['Fifo', 'Backfill']:
+            Config.Validation.append((Level.WARNING, f"Unknown ResourceScheduler '{self.ResourceScheduler}', "
+                                                     f"using 'Fifo'. Valid values are 'Fifo' and 'Backfill'"))
+
         for entry in [self.Logging, self.Portal, self.SliceManager, self.Tap,
                       self.Grafana, self.InfluxDb, self.Metadata, self.EastWest, ]:
             Config.Validation.extend(entry.Validation)
@@ -1,6 +1,7 @@
 from collections import deque
 from Experiment import ExperimentRun, ExperimentStatus
-from typing import Deque, Optional, List, Dict
+from typing import Deque, Optional, List, Dict, Set
+from threading import Condition, Lock
 from Helper import Log
 from .status import Status
 from Scheduler.facility.routes import load_raw
@@ -9,11 +10,14 @@ import os
 
 class ExecutionQueue:
     queue: Deque[ExperimentRun] = deque()
+    index: Dict[int, ExperimentRun] = {}  # Same executions as the queue, by id
+    lock = Lock()
+    changed: Set[int] = set()  # Executions that must be updated as soon as possible
+    condition = Condition()
 
     @classmethod
     def Find(cls, executionId) -> Optional[ExperimentRun]:
-        needles = [e for e in cls.queue if e.Id == executionId]
-        return needles[0] if needles else None
+        return cls.index.get(executionId, None)
 
     @classmethod
     def Create(cls, params: Dict) -> ExperimentRun:
@@ -70,8 +74,11 @@ class ExecutionQueue:
                 Log.I(f"Copied Scenario '{name}' YAML to {dest_path}")
 
         execution = ExperimentRun(executionId, params)
-        cls.queue.appendleft(execution)
+        with cls.lock:
+            cls.queue.appendleft(execution)
+            cls.index[execution.Id] = execution
         Log.I(f'Created Execution {execution.Id}')
+        cls.Notify(execution.Id)
         return execution
 
     @classmethod
@@ -79,7 +86,9 @@ class ExecutionQueue:
         execution = cls.Find(executionId)
         if execution is not None:
             execution.Save()
-            cls.queue.remove(execution)
+            with cls.lock:
+                cls.queue.remove(execution)
+                cls.index.pop(execution.Id, None)
 
     @classmethod
     def Cancel(cls, executionId: int):
@@ -87,19 +96,43 @@ class ExecutionQueue:
         if execution is not None:
             Log.I(f'Cancelling execution {execution.Id}')
             execution.Cancel()
+            cls.Notify(executionId)
         else:
             Log.W(f'Cannot cancel execution {executionId}: Not found')
 
     @classmethod
     def Retrieve(cls, status: Optional[ExperimentStatus] = None) -> List[ExperimentRun]:
+        with cls.lock:
+            executions = list(cls.queue)
         if status is None:
-            return list(cls.queue)
+            return executions
         else:
-            return [e for e in cls.queue if e.CoarseStatus == status]
+            return [e for e in executions if e.CoarseStatus == status]
 
     @classmethod
-    def UpdateAll(cls):
+    def Notify(cls, executionId: int):
+        """Requests the update of an execution (for example, when one of its stages has finished), waking up the
+        heartbeat"""
+        with cls.condition:
+            cls.changed.add(executionId)
+            cls.condition.notify_all()
+
+    @classmethod
+    def WaitForChanges(cls, timeout: float) -> Set[int]:
+        """Waits (up to `timeout` seconds) until the update of an execution is requested. Returns the ids of the
+        executions to update, which will be empty if the timeout expired"""
+        with cls.condition:
+            cls.condition.wait_for(lambda: len(cls.changed) != 0, timeout)
+            changed, cls.changed = cls.changed, set()
+        return changed
+
+    @classmethod
+    def UpdateAll(cls, executionIds: Optional[Set[int]] = None):
+        """Advances the executions in the queue (only those in `executionIds`, if specified) and removes the
+        ones that are no longer active"""
         executions = cls.Retrieve()
+        if executionIds is not None:
+            executions = [e for e in executions if e.Id in executionIds]
         if len(executions) != 0:
             Log.D(f"UpdateAll: {(', '.join(str(e) for e in executions))}")
         for execution in reversed(executions):  # Reversed to give priority to older executions (for resources)
@@ -110,6 +143,8 @@ class ExecutionQueue:
                     Log.I(f'Advancing Execution {execution.Id}')
                     execution.Advance()
                     Log.D(f'{execution.Id}: {pre.name} -> {execution.CoarseStatus.name}')
+                    if not execution.Active:
+                        cls.Notify(execution.Id)  # Remove it from the queue on the next update
                 else:
                     Log.I(f'Removing Execution {execution.Id} from queue (status: {execution.CoarseStatus.name})')
                     cls.Delete(execution.Id)
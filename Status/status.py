@@ -26,14 +26,19 @@ class Status:
     @classmethod
     @synchronized(lock)
     def Save(cls):
+        cls.save()
+
+    @classmethod
+    def save(cls):
         data = {'NextId': cls.nextId}
         Serialize.Save(data, Serialize.Path('persistence'))
 
     @classmethod
+    @synchronized(lock)
     def NextId(cls):
         res = cls.nextId
         cls.nextId += 1
-        cls.Save()
+        cls.save()
         return res
 
     @classmethod
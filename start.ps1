@@ -1,7 +1,8 @@
 $port = if ($null -eq $args[0]) { "5001" } else { $args[0] }
+$threads = if ($null -eq $args[1]) { "8" } else { $args[1] }
 
 Write-Host "Starting ELCM on port $port"
 
 & ./venv/Scripts/activate.ps1
-& waitress-serve --threads=1 --listen=*:$port Scheduler:app
+& waitress-serve --threads=$threads --listen=*:$port Scheduler:app
 & deactivate
\ No newline at end of file
@@ -1,12 +1,9 @@
 #!/usr/bin/env bash
 
-if [ "$#" -ne 1 ]; then
-    port="5001"
-else
-    port=$1
-fi
+port=${1:-5001}
+threads=${2:-8}
 
 echo Starting ELCM on port $port
 source ./venv/bin/activate
-waitress-serve --threads=1 --listen=*:$port Scheduler:app
+waitress-serve --threads=$threads --listen=*:$port Scheduler:app
 deactivate